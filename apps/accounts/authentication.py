@@ -1,7 +1,120 @@
+# apps/accounts/authentication.py
+"""
+JWT authentication from the Authorization header or the access_token cookie.
+
+With settings.JWT_CLAIMS_USER, request.user is a ClaimsUser built from the
+claims CustomTokenObtainPairSerializer puts in the token (username, email,
+role, is_superuser) instead of the users row read on every request. Views
+that need the model instance (to save it, or to compare it with User
+objects) set `claims_user = False` and get the row as before.
+
+Changing a user marks the claims of the access tokens issued before the
+change as outdated (mark_claims_changed): those tokens are authenticated
+against the users row until they are refreshed, and a refresh reads the
+claims from the row again. The marks live in the Django cache, so every
+process sees them only when the cache is shared (not LocMemCache).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import UserRole
+
+CLAIMS_CHANGED_KEY = 'jwt:claims-changed:{}'
+USER_CACHE_SIZE = 1024
+USER_CACHE_TTL = 30  # seconds
+
+_users = OrderedDict()
+_users_lock = threading.Lock()
+
+
+def cached_user(pk):
+    """
+    The users row of `pk` (None when deleted) from a per-process LRU, at
+    most USER_CACHE_TTL seconds old. Read only: never save it.
+    """
+    now = time.monotonic()
+    with _users_lock:
+        entry = _users.get(pk)
+        if entry is not None and entry[1] > now:
+            _users.move_to_end(pk)
+            return entry[0]
+    user = get_user_model()._default_manager.filter(pk=pk).first()
+    with _users_lock:
+        _users[pk] = (user, now + USER_CACHE_TTL)
+        _users.move_to_end(pk)
+        while len(_users) > USER_CACHE_SIZE:
+            _users.popitem(last=False)
+    return user
+
+
+def mark_claims_changed(pk):
+    """
+    Stop trusting the claims of the access tokens issued to user `pk` so far.
+    The mark outlives them by no more than the access token lifetime.
+    """
+    lifetime = int(settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds())
+    cache.set(CLAIMS_CHANGED_KEY.format(pk), time.time(), timeout=lifetime)
+    with _users_lock:
+        _users.pop(pk, None)
+
+
+def claims_current(token):
+    changed_at = cache.get(CLAIMS_CHANGED_KEY.format(token[api_settings.USER_ID_CLAIM]))
+    return changed_at is None or token.get('iat', 0) > changed_at
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user built from the access token. The role checks of User work
+    from the claims; any other User attribute (first_name, get_full_name...)
+    is read from cached_user(). It is not a model instance: filter and set
+    foreign keys with its pk (assigned_to_id=user.pk).
+    """
+    @cached_property
+    def id(self):
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    def is_admin(self):
+        return self.role == UserRole.ADMIN or self.is_superuser
+
+    def is_manager(self):
+        return self.role == UserRole.MANAGER
+
+    def is_agent(self):
+        return self.role == UserRole.AGENT
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        user = cached_user(self.pk)
+        if user is None:
+            raise AttributeError(name)
+        return getattr(user, name)
+
 
 class CookieJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
+        # The view decides whether a ClaimsUser will do
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        self.claims_user = getattr(settings, 'JWT_CLAIMS_USER', False) and getattr(view, 'claims_user', True)
+
         # Try to get the token from the Authorization header first
         header = self.get_header(request)
         if header is not None:
@@ -12,3 +125,14 @@ class CookieJWTAuthentication(JWTAuthentication):
             validated_token = self.get_validated_token(raw_token)
             return self.get_user(validated_token), validated_token
         return None
+
+    def get_user(self, validated_token):
+        # Tokens issued before the role claim was added lack the claims
+        if (
+            getattr(self, 'claims_user', False)
+            and api_settings.USER_ID_CLAIM in validated_token
+            and 'role' in validated_token
+            and claims_current(validated_token)
+        ):
+            return ClaimsUser(validated_token)
+        return super().get_user(validated_token)
@@ -1,25 +1,39 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from django.core.exceptions import ValidationError
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .tokens import RotatingRefreshToken
 
 User = get_user_model()
 
 
+def set_user_claims(token, user):
+    """
+    The claims request.user is built from with settings.JWT_CLAIMS_USER
+    (see apps.accounts.authentication.ClaimsUser).
+    """
+    token['username'] = user.username
+    token['email'] = user.email
+    token['role'] = user.role
+    token['is_superuser'] = user.is_superuser
+
+
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Custom JWT token serializer that includes user role and other details
     """
+    token_class = RotatingRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
 
         # Add custom claims
-        token['username'] = user.username
-        token['email'] = user.email
-        token['role'] = user.role
-        token['is_superuser'] = user.is_superuser
+        set_user_claims(token, user)
         
         return token
 
@@ -37,6 +51,41 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Gives the new tokens the user's current claims. Those of the refresh
+    token date from the login, before any role change since. The refresh
+    token is checked against the revoked jtis in memory (see
+    apps.accounts.tokens).
+
+    Follows TokenRefreshSerializer.validate, setting the claims from the
+    users row it loads for the active check, before the access token is
+    derived from the refresh token.
+    """
+    token_class = RotatingRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user = User.objects.filter(**{jwt_settings.USER_ID_FIELD: refresh.payload.get(jwt_settings.USER_ID_CLAIM)}).first()
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        set_user_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer for user registration (only for Manager and Agent roles)
@@ -89,6 +138,16 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'role', 'is_active', 'date_joined', 'last_login', 'created_at', 'updated_at', 'password_last_changed_at')
 
 
+class UserSummarySerializer(serializers.ModelSerializer):
+    """
+    The user fields a list needs to show who a record belongs to
+    """
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name', 'profile_image')
+        read_only_fields = fields
+
+
 class PasswordChangeSerializer(serializers.Serializer):
     """
     Serializer for password change endpoint
@@ -1,9 +1,14 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from apps.core.cache import track_versions
+from .authentication import mark_claims_changed
 
 User = get_user_model()
 
+# Users are embedded in cached lead and site visit reads
+track_versions(User)
+
 @receiver(post_save, sender=User)
 def set_superuser_as_admin(sender, instance, created, **kwargs):
     """
@@ -11,4 +16,15 @@ def set_superuser_as_admin(sender, instance, created, **kwargs):
     """
     if instance.is_superuser and instance.role != 'admin':
         instance.role = 'admin'
-        instance.save(update_fields=['role'])
\ No newline at end of file
+        instance.save(update_fields=['role'])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_token_claims(sender, instance, created=False, **kwargs):
+    """
+    The role, active flag or names in the access tokens already issued may
+    no longer be true: stop building request.user from their claims.
+    """
+    if not created:
+        mark_claims_changed(instance.pk)
@@ -0,0 +1,114 @@
+# apps/accounts/tokens.py
+"""
+Refresh tokens checked against an in-process set of revoked jtis.
+
+simplejwt checks every refresh token against the BlacklistedToken table
+(one query per refresh, on a table that only grows). With
+ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION, refreshing a token
+blacklists it anyway, so RotatingRefreshToken does the check in memory,
+against the jtis loaded by RevokedJtis, and relies on the blacklist write
+for what the set has not loaded yet: a token that is already blacklisted
+when the refresh blacklists it is refused (reuse of a rotated token).
+
+purge_expired_tokens keeps the tables, and this set, to the tokens that
+have not expired.
+"""
+import threading
+import time
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+REVOKED_JTIS_REFRESH_INTERVAL = 60  # seconds
+
+
+class RevokedJtis:
+    """
+    The jtis of the blacklisted tokens that have not expired, reloaded at
+    most every `refresh_interval` seconds. Only the rows added since the
+    previous load are read; expired jtis are dropped.
+    """
+    def __init__(self, refresh_interval=REVOKED_JTIS_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._expires_at = {}
+        self._last_id = 0
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            self.reload()
+        return jti in self._expires_at
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._expires_at[jti] = expires_at
+
+    def reload(self):
+        now = timezone.now()
+        rows = (
+            BlacklistedToken.objects.filter(pk__gt=self._last_id, token__expires_at__gt=now)
+            .order_by('pk').values_list('pk', 'token__jti', 'token__expires_at')
+        )
+        with self._lock:
+            for pk, jti, expires_at in rows:
+                self._expires_at[jti] = expires_at
+                self._last_id = pk
+            self._expires_at = {jti: expires_at for jti, expires_at in self._expires_at.items() if expires_at > now}
+            self._loaded_at = time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._expires_at = {}
+            self._last_id = 0
+            self._loaded_at = None
+
+
+revoked_jtis = RevokedJtis()
+
+
+def rotation_blacklists():
+    return api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+
+
+class RotatingRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        if not rotation_blacklists():
+            return super().check_blacklist()
+        if self.payload[api_settings.JTI_CLAIM] in revoked_jtis:
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """
+        Blacklist the token, refusing it if it already was: its check may
+        have been done against a set that did not have it yet.
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        token = OutstandingToken.objects.filter(jti=jti).first()
+        if token is None:
+            # Issued before it was outstanded; simplejwt creates the row
+            blacklisted, created = super().blacklist()
+        else:
+            blacklisted, created = BlacklistedToken.objects.get_or_create(token=token)
+        revoked_jtis.add(jti, datetime_from_epoch(self.payload['exp']))
+        if not created and rotation_blacklists():
+            raise TokenError(_('Token is blacklisted'))
+        return blacklisted, created
+
+    def outstand(self):
+        # The rotated token's user was just checked by the refresh: no need
+        # to load it again for the row
+        return OutstandingToken.objects.get_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                'user_id': self.payload.get(api_settings.USER_ID_CLAIM),
+                'created_at': self.current_time,
+                'token': str(self),
+                'expires_at': datetime_from_epoch(self.payload['exp']),
+            },
+        )
@@ -3,16 +3,20 @@ from rest_framework import generics, status, permissions # Make sure permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.conf import settings
-from django.core.mail import send_mail
+from django.db import transaction
 from django.utils import timezone
 
+from apps.core.email import queue_email
+
+from .tokens import RotatingRefreshToken
+
 from .serializers import (
     CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
     UserRegistrationSerializer,
     UserSerializer,
     PasswordChangeSerializer,
@@ -108,10 +112,11 @@ class UserListCreateView(generics.ListCreateAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            user = serializer.save() # User is created here
+            # The welcome email is queued in the same transaction as the user,
+            # and delivered by the send_queued_emails worker.
+            with transaction.atomic():
+                user = serializer.save() # User is created here
 
-            # Send welcome email
-            try:
                 subject = f"Welcome to the Team, {user.first_name}!"
                 message_body = f"""
 Hi {user.first_name} {user.last_name},
@@ -128,18 +133,7 @@ If you have any questions, please contact your administrator.
 Best regards,
 The Admin Team
 """
-                send_mail(
-                    subject,
-                    message_body,
-                    settings.DEFAULT_FROM_EMAIL, # Your default 'from' email address
-                    [user.email], # Send to the new user's email
-                    fail_silently=False, # Raise an error if sending fails
-                )
-            except Exception as e:
-                # Log the error (e.g., using Python's logging module)
-                print(f"Error sending welcome email to {user.email}: {e}")
-                # You might want to inform the admin that the user was created but the email failed
-                # For now, we'll let the user creation succeed even if email fails.
+                queue_email(subject, message_body, [user.email])
 
             return Response(
                 UserSerializer(user).data, # Respond with the created user's data
@@ -156,6 +150,8 @@ class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
     # Permissions here need careful consideration based on who can view/edit whose profile
     permission_classes = [permissions.IsAuthenticated]
     queryset = User.objects.all() # This will be used if 'pk' is in URL
+    # Serves and saves request.user itself (see CookieJWTAuthentication)
+    claims_user = False
 
     def get_object(self):
         # For retrieve/update operations for the logged-in user via /api/auth/user/
@@ -194,7 +190,7 @@ class LogoutView(APIView):
             # The refresh token might be in cookies now, not request.data
             refresh_token = request.COOKIES.get('refresh_token')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = RotatingRefreshToken(refresh_token)
                 token.blacklist()
             
             response = Response({"detail": "Successfully logged out."}, status=status.HTTP_200_OK)
@@ -216,6 +212,7 @@ class PasswordChangeView(APIView):
     API view for changing user password
     """
     permission_classes = [permissions.IsAuthenticated]
+    claims_user = False
 
     def post(self, request):
         serializer = PasswordChangeSerializer(data=request.data, context={'request': request})
@@ -248,12 +245,10 @@ class PasswordResetRequestView(APIView):
                 
                 reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/" # Ensure FRONTEND_URL is in settings
                 
-                send_mail(
+                queue_email(
                     'Password Reset for Real Estate CRM',
                     f'Click the following link to reset your password: {reset_url}',
-                    settings.DEFAULT_FROM_EMAIL,
                     [user.email],
-                    fail_silently=False,
                 )
                 
                 return Response(
@@ -321,6 +316,8 @@ class CustomTokenRefreshView(TokenRefreshView):
     Custom token refresh view that sets the new access token as an HttpOnly cookie
     and expects the refresh token from an HttpOnly cookie.
     """
+    serializer_class = CustomTokenRefreshSerializer
+
     def post(self, request, *args, **kwargs):
         # Override to ensure refresh token is taken from cookies if not in request body
         # DRF's TokenRefreshView expects 'refresh' in request.data
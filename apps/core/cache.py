@@ -0,0 +1,202 @@
+# apps/core/cache.py
+"""
+Versioned caching of API reads.
+
+Every cached model has a data version in the cache, bumped once a save or
+delete of one of its rows is committed. A cached value is keyed by its
+name, the endpoint, the normalized query parameters, the scope of rows the
+user may see and the versions of the models it is built from. A write thus
+makes every affected entry unreachable in O(1), with nothing to find or
+delete; the TTL only bounds how long unused entries occupy the cache.
+
+Writes that send no signals (QuerySet.update(), bulk_create) must call
+bump_version() themselves.
+
+The versions must be seen by every process that reads or writes the data,
+so the default cache has to be shared (database or Redis, not LocMemCache):
+the core.W001 check warns otherwise.
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = 'data-version:'
+STATS_KEY_PREFIX = 'cache-stats:'
+
+
+def cache_is_shared():
+    """
+    Whether the default cache is seen by every process. LocMemCache is per
+    process and DummyCache keeps nothing.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def version_name(model_or_name):
+    """
+    Name of a data version: the model label for models.
+    """
+    if isinstance(model_or_name, str):
+        return model_or_name
+    return model_or_name._meta.label_lower
+
+
+def get_versions(names):
+    """
+    Current versions of `names`, in one cache round trip when all are set.
+    """
+    keys = [VERSION_KEY_PREFIX + name for name in names]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Start from the clock so a version key lost from the cache never
+            # brings back entries cached under an older version number.
+            cache.add(key, int(time.time() * 1000), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model_or_name):
+    key = VERSION_KEY_PREFIX + version_name(model_or_name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_versions([version_name(model_or_name)])
+
+
+def _bump_version_on_commit(sender, **kwargs):
+    # After commit, so no request can cache the old data under the new version
+    transaction.on_commit(partial(bump_version, sender))
+
+
+def track_versions(*models):
+    """
+    Bump the data version of `models` on every post_save and post_delete.
+    """
+    for model in models:
+        uid = f'track_versions:{version_name(model)}'
+        post_save.connect(_bump_version_on_commit, sender=model, dispatch_uid=uid)
+        post_delete.connect(_bump_version_on_commit, sender=model, dispatch_uid=uid)
+
+
+def user_scope(user):
+    """
+    Admins and managers all see every row, so they share cache entries;
+    other users get entries of their own.
+    """
+    if user.is_superuser or getattr(user, 'role', None) in ['admin', 'manager']:
+        return 'all'
+    return f'user:{user.pk}'
+
+
+class VersionedCache:
+    """
+    A named family of cached values that depend on the data versions of
+    `models` (model classes or version names). Hits and misses are counted
+    per name, see cache_stats().
+    """
+    registry = {}
+
+    def __init__(self, name, models, timeout, scope=user_scope):
+        self.name = name
+        self.versions = tuple(version_name(model) for model in models)
+        self.timeout = timeout
+        self.scope = scope
+        VersionedCache.registry[name] = self
+
+    def key(self, request, params=None, scope=None):
+        """
+        Cache key of `request`: its endpoint, `params` (default: the query
+        parameters) in a normalized order, the user's scope and the current
+        data versions.
+        """
+        if params is None:
+            params = {key: request.query_params.getlist(key) for key in request.query_params}
+        params = sorted((key, sorted(map(str, value)) if isinstance(value, list) else str(value)) for key, value in params.items())
+        endpoint = request.build_absolute_uri(request.path)
+        digest = hashlib.md5(repr((endpoint, params)).encode('utf-8'), usedforsecurity=False).hexdigest()
+        if scope is None:
+            scope = self.scope(request.user) if self.scope else 'all'
+        versions = '.'.join(map(str, get_versions(self.versions)))
+        return f'{self.name}:{versions}:{scope}:{digest}'
+
+    def get(self, key):
+        value = cache.get(key)
+        _count(self.name, 'hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key, value):
+        cache.set(key, value, self.timeout)
+
+
+def _count(name, outcome):
+    key = f'{STATS_KEY_PREFIX}{name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cache_stats(reset=False):
+    """
+    [{'name', 'hits', 'misses', 'hit_rate'}] of every VersionedCache, as
+    counted in the cache (so across processes when the cache is shared).
+    """
+    keys = [f'{STATS_KEY_PREFIX}{name}:{outcome}' for name in sorted(VersionedCache.registry) for outcome in ('hits', 'misses')]
+    counts = cache.get_many(keys)
+    if reset:
+        cache.delete_many(keys)
+    stats = []
+    for name in sorted(VersionedCache.registry):
+        hits = counts.get(f'{STATS_KEY_PREFIX}{name}:hits', 0)
+        misses = counts.get(f'{STATS_KEY_PREFIX}{name}:misses', 0)
+        stats.append({
+            'name': name,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits * 100.0 / (hits + misses), 1) if hits + misses else None,
+        })
+    return stats
+
+
+class CachedListMixin:
+    """
+    Caches the list response of a viewset per (endpoint, query parameters,
+    user scope, versions of `cache_models`). Only the list: retrieve and
+    the writes check permissions on the row itself.
+
+    `cache_scope(user)` must tell apart users whose get_queryset() differ.
+    Combined with ConditionalGetMixin, list it first so 304s are answered
+    before the cache is read.
+    """
+    cache_models = ()
+    cache_timeout = 5 * 60  # seconds
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_models:
+            cls.list_cache = VersionedCache(f'{cls.__name__}.list', cls.cache_models, cls.cache_timeout)
+
+    def cache_scope(self, user):
+        return user_scope(user)
+
+    def list(self, request, *args, **kwargs):
+        list_cache = getattr(self, 'list_cache', None)
+        if list_cache is None:
+            return super().list(request, *args, **kwargs)
+        cache_key = list_cache.key(request, scope=self.cache_scope(request.user))
+        data = list_cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            list_cache.set(cache_key, response.data)
+        return response
@@ -0,0 +1,21 @@
+# apps/core/checks.py
+from django.core.checks import Tags, Warning, register
+
+from .cache import cache_is_shared
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    return [
+        Warning(
+            'The default cache is not shared between processes.',
+            hint=(
+                'The versioned caches of apps.core.cache only see the writes '
+                'made by their own process: set CACHES to the database cache '
+                'or Redis.'
+            ),
+            id='core.W001',
+        )
+    ]
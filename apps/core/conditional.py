@@ -0,0 +1,113 @@
+# apps/core/conditional.py
+"""
+Conditional GET (ETag / Last-Modified) for model viewsets.
+
+A list's validator is the data versions (apps.core.cache) of the models it
+is built from, a detail's the row's updated_at and the data versions of the
+models embedded in it. Both are weak ETags that also cover the user and the
+query string (filters, page, ?fields=). Versions are read from the cache,
+so computing the validators costs no query. When the client's
+If-None-Match / If-Modified-Since still matches, the view answers 304 Not
+Modified before anything is serialized.
+
+The versions are only trusted when the cache is shared by every process
+(cache_is_shared()): otherwise a worker that did not see a write would keep
+answering 304. The validators are then read from the database instead: the
+MAX(updated_at) and COUNT(*) of the filtered queryset for a list, and the
+latest updated_at of the embedded models.
+
+A data version carries no date: with a shared cache, only the details of
+views that embed no other models get a Last-Modified, their row's
+updated_at. Writes that skip auto_now or the signals (QuerySet.update(),
+bulk_update) must set updated_at and call bump_version() themselves for the
+validators to change.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .cache import cache_is_shared, get_versions, version_name
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified on list and retrieve. `etag_related_models` are
+    models whose rows appear nested in the representation; a change to any
+    of them (its data version, see the module docstring) changes every
+    validator of the view.
+
+    The list depends on the versions of `cache_models` when the view caches
+    its list (CachedListMixin), else on those of its model and
+    `etag_related_models`.
+    """
+    etag_related_models = ()
+
+    def etag_list_models(self):
+        return getattr(self, 'cache_models', ()) or (self.get_queryset().model,) + tuple(self.etag_related_models)
+
+    def list(self, request, *args, **kwargs):
+        if cache_is_shared():
+            last_modified = None
+            state = get_versions([version_name(model) for model in self.etag_list_models()])
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+            aggregate = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+            last_modified, state = self.related_state(aggregate['last_modified'])
+            state.append(aggregate['count'])
+        not_modified, etag, last_modified = self.check_not_modified(request, last_modified, *state)
+        if not_modified is not None:
+            return self.with_validators(not_modified, etag, last_modified)
+        return self.with_validators(super().list(request, *args, **kwargs), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if cache_is_shared():
+            # The related models' changes cannot be dated
+            last_modified = None if self.etag_related_models else instance.updated_at
+            state = get_versions([version_name(model) for model in self.etag_related_models])
+        else:
+            last_modified, state = self.related_state(instance.updated_at)
+        not_modified, etag, last_modified = self.check_not_modified(request, last_modified, instance.pk, instance.updated_at, *state)
+        if not_modified is not None:
+            return self.with_validators(not_modified, etag, last_modified)
+        serializer = self.get_serializer(instance)
+        return self.with_validators(Response(serializer.data), etag, last_modified)
+
+    def related_state(self, last_modified):
+        """
+        (latest of `last_modified` and the related models' updated_at, the
+        list of those updated_at) read from the database.
+        """
+        state = [last_modified]
+        for model in self.etag_related_models:
+            related = model._default_manager.aggregate(last_modified=Max('updated_at'))['last_modified']
+            state.append(related)
+            if related and (last_modified is None or related > last_modified):
+                last_modified = related
+        return last_modified, state
+
+    def check_not_modified(self, request, last_modified, *state):
+        """
+        (304/412 response or None, ETag, Last-Modified timestamp) of a
+        resource last modified at `last_modified` (None when unknown), with
+        `state` the values that change with it (pk, updated_at, versions).
+        """
+        parts = (type(self).__name__, self.action, request.user.pk, request.get_full_path()) + state
+        digest = hashlib.md5('|'.join(map(str, parts)).encode('utf-8'), usedforsecurity=False).hexdigest()
+        etag = f'W/"{digest}"'
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(request, etag=etag, last_modified=timestamp), etag, timestamp
+
+    def with_validators(self, response, etag, last_modified):
+        if response.status_code not in (200, 304):
+            return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Revalidate on every use, and only in the user's own cache
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
@@ -0,0 +1,174 @@
+# apps/core/email.py
+"""
+Transactional email outbox.
+
+Request handlers call queue_email(), which only inserts an OutboundEmail row.
+The `send_queued_emails` management command delivers queued rows over a
+single reused SMTP connection, skips duplicates and retries failures with
+exponential backoff, including when the SMTP server is unreachable.
+"""
+import hashlib
+import json
+import logging
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+
+# How long a worker owns the emails it claimed. Longer than sending a batch
+# takes, so no other worker sends them again meanwhile.
+CLAIM_LEASE = timedelta(minutes=10)
+
+# An identical email (same recipients, subject, body and template context)
+# that was already sent within this window is not sent again.
+DEDUPE_WINDOW = timedelta(hours=1)
+
+
+def _dedupe_key(subject, body, recipients, html_template, context):
+    payload = json.dumps([subject, body, sorted(recipients), html_template, context], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def queue_email(subject, body, recipient_list, html_template='', context=None, from_email=None):
+    """
+    Add an email to the outbox. The HTML part is rendered by the worker from
+    `html_template` and `context`, so the context must be JSON serializable.
+    When called inside a transaction the email is only sent if it commits.
+    """
+    context = context or {}
+    recipients = [address for address in recipient_list if address]
+    if not recipients:
+        return None
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+        html_template=html_template,
+        context=context,
+        dedupe_key=_dedupe_key(subject, body, recipients, html_template, context),
+        next_attempt_at=timezone.now(),
+    )
+
+
+@lru_cache(maxsize=64)
+def _compiled_template(name):
+    # Templates are compiled once per worker process instead of once per email.
+    return get_template(name)
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.recipients,
+        connection=connection,
+    )
+    if email.html_template:
+        message.attach_alternative(_compiled_template(email.html_template).render(email.context), 'text/html')
+    return message
+
+
+def _retry_delay(attempts):
+    return min(RETRY_BASE_DELAY * (2 ** (attempts - 1)), RETRY_MAX_DELAY)
+
+
+def _record_failure(email, error):
+    logger.warning(f"Error sending queued email {email.pk}: {error}")
+    email.last_error = str(error)
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'failed'
+    else:
+        email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception as e:
+        logger.warning(f"Error closing SMTP connection: {e}")
+
+
+def _claim_batch(batch_size):
+    """
+    Lock a batch of due emails with SKIP LOCKED, mark the duplicates and
+    count an attempt on the others. The claimed rows are leased until
+    CLAIM_LEASE from now: other workers skip them, and they are retried
+    then if this worker dies before recording the results.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'created_at')[:batch_size]
+        )
+        if not batch:
+            return []
+
+        already_sent = set(
+            OutboundEmail.objects.filter(
+                status='sent',
+                sent_at__gte=now - DEDUPE_WINDOW,
+                dedupe_key__in={email.dedupe_key for email in batch},
+            ).values_list('dedupe_key', flat=True)
+        )
+        for email in batch:
+            if email.dedupe_key in already_sent:
+                email.status = 'duplicate'
+            else:
+                already_sent.add(email.dedupe_key)
+                email.attempts += 1
+                email.next_attempt_at = now + CLAIM_LEASE
+        OutboundEmail.objects.bulk_update(batch, ['status', 'attempts', 'next_attempt_at'])
+    return batch
+
+
+def send_queued_emails(batch_size=100):
+    """
+    Deliver one batch of due emails. Returns the number of rows handled.
+
+    The batch is claimed in a short transaction and sent outside of it, so
+    a slow or unreachable SMTP server holds no locks. When the server
+    cannot be reached, every email not sent yet is recorded as a failed
+    attempt and retried with backoff.
+    """
+    batch = _claim_batch(batch_size)
+    pending = [email for email in batch if email.status == 'pending']
+
+    connection = get_connection()
+    try:
+        for index, email in enumerate(pending):
+            try:
+                connection.open()
+            except Exception as e:
+                for unsent in pending[index:]:
+                    _record_failure(unsent, e)
+                break
+            try:
+                connection.send_messages([_build_message(email, connection)])
+            except Exception as e:
+                _record_failure(email, e)
+                # The connection may be unusable after an SMTP error
+                _close(connection)
+            else:
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+    finally:
+        _close(connection)
+
+    OutboundEmail.objects.bulk_update(pending, ['status', 'next_attempt_at', 'last_error', 'sent_at'])
+    return len(batch)
@@ -0,0 +1,141 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.core.pagination import keyset_filter
+from apps.leads.models import Lead
+from apps.property.models import PropertyImage
+from apps.site_visits.models import SiteVisit
+
+OPEN_VISIT_STATUSES = ['scheduled', 'confirmed']
+
+
+def _samples():
+    """
+    Parameter values for the hot queries, taken from the current data.
+    """
+    lead = Lead.objects.exclude(assigned_to=None).exclude(property=None).order_by('pk').first()
+    visit = SiteVisit.objects.order_by('pk').first()
+    if lead is None or visit is None:
+        raise CommandError('Leads and site visits are required. Run seed_leads first.')
+    middle_lead = Lead.objects.order_by('-created_at', '-id')[Lead.objects.count() // 2]
+    middle_visit = SiteVisit.objects.order_by('-created_at', '-id')[SiteVisit.objects.count() // 2]
+    now = timezone.now()
+    return {
+        'agent': lead.assigned_to_id,
+        'property': lead.property_id,
+        'properties': list(PropertyImage.objects.order_by().values_list('property_id', flat=True).distinct()[:10]),
+        'lead_cursor': (middle_lead.created_at, middle_lead.pk),
+        'visit_cursor': (middle_visit.created_at, middle_visit.pk),
+        'month_start': now.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+        'year_ago': (now - timedelta(days=365)).replace(hour=0, minute=0, second=0, microsecond=0),
+        'today': timezone.localdate(),
+    }
+
+
+# (name, function building the query from _samples()), after the queries of
+# the lead, site visit and property views.
+HOT_QUERIES = [
+    ('leads: agent list', lambda s: Lead.objects.filter(assigned_to_id=s['agent']).order_by('-created_at')[:10]),
+    ('leads: ?status= list', lambda s: Lead.objects.filter(status='Qualified').order_by('-created_at')[:10]),
+    ('leads: ?tags= list', lambda s: Lead.objects.filter(tags__contains=['nri', 'loan']).order_by('-created_at')[:10]),
+    ('leads: cursor page', lambda s: keyset_filter(Lead.objects.all(), s['lead_cursor']).order_by('-created_at', '-id')[:11]),
+    ('leads: agent dashboard_stats month', lambda s: (
+        Lead.objects.filter(assigned_to_id=s['agent'], created_at__gte=s['month_start'])
+        .values('status').annotate(count=Count('id'))
+    )),
+    ('leads: revenue_overview year', lambda s: (
+        Lead.objects.filter(status='Converted', updated_at__gte=s['year_ago'])
+        .annotate(period=TruncMonth('updated_at')).values('period')
+        .annotate(total_revenue=Sum('budget_amount')).order_by('period')
+    )),
+    ('leads: property conversions', lambda s: (
+        Lead.objects.filter(property_id=s['property'], status='Converted').values('id')
+    )),
+    ('site visits: cursor page', lambda s: (
+        keyset_filter(SiteVisit.objects.all(), s['visit_cursor']).order_by('-created_at', '-id')[:11]
+    )),
+    ('site visits: upcoming', lambda s: (
+        SiteVisit.objects.filter(date__gte=s['today'], status__in=OPEN_VISIT_STATUSES).order_by('date', 'time')[:5]
+    )),
+    ('site visits: pending count', lambda s: (
+        SiteVisit.objects.filter(status__in=OPEN_VISIT_STATUSES).values('id')
+    )),
+    ('site visits: upcoming count', lambda s: SiteVisit.objects.filter(date__gte=s['today']).values('id')),
+    ('property images: prefetch', lambda s: PropertyImage.objects.filter(property_id__in=s['properties'])),
+]
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _plan_nodes(child)
+
+
+def _table_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+        return max(int(cursor.fetchone()[0]), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN (ANALYZE, BUFFERS) on the hot lead, site visit and property queries '
+        'and fail if any of them reads its table with a sequential scan. Run it on a '
+        'database filled by seed_leads: on small tables a sequential scan is the cheaper '
+        'plan and is only reported.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=10000,
+            help='Sequential scans of tables with fewer (estimated) rows are not failures.'
+        )
+        parser.add_argument('--no-analyze', action='store_true', help='Do not ANALYZE the tables first.')
+        parser.add_argument('--plans', action='store_true', help='Print the full plan of every query.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('explain_hot_queries needs PostgreSQL.')
+
+        tables = [model._meta.db_table for model in (Lead, SiteVisit, PropertyImage)]
+        if not options['no_analyze']:
+            with connection.cursor() as cursor:
+                for table in tables:
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+        table_rows = {table: _table_rows(table) for table in tables}
+        samples = _samples()
+
+        failures = []
+        for name, build in HOT_QUERIES:
+            queryset = build(samples)
+            table = queryset.model._meta.db_table
+            plan = json.loads(queryset.explain(format='json', analyze=True, buffers=True))[0]
+            nodes = list(_plan_nodes(plan['Plan']))
+            seq_scan = any(node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == table for node in nodes)
+            scans = ', '.join(
+                f"{node['Node Type']} using {node['Index Name']}" if 'Index Name' in node else node['Node Type']
+                for node in nodes if node.get('Relation Name') == table or node['Node Type'] == 'Bitmap Index Scan'
+            )
+
+            verdict = 'ok'
+            if seq_scan:
+                verdict = 'SEQ SCAN'
+                if table_rows[table] < options['min_rows']:
+                    verdict = f'seq scan (table has ~{table_rows[table]} rows)'
+                else:
+                    failures.append(name)
+            buffers = plan['Plan'].get('Shared Hit Blocks', 0) + plan['Plan'].get('Shared Read Blocks', 0)
+            self.stdout.write(
+                f'{name:<36} {plan["Execution Time"]:9.2f}ms buffers={buffers:<6} {verdict:<10} {scans}'
+            )
+            if options['plans']:
+                self.stdout.write(queryset.explain(analyze=True, buffers=True))
+
+        if failures:
+            raise CommandError(f'Sequential scans in: {", ".join(failures)}')
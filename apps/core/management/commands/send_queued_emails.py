@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.email import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Deliver emails from the outbox. Runs until stopped unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Deliver the emails that are currently due and exit.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of emails sent over one SMTP connection.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait before polling again when the outbox is empty.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                handled = send_queued_emails(batch_size=options['batch_size'])
+            except Exception as e:
+                # Keep the worker alive: the claimed emails are retried when
+                # their lease expires
+                if options['once']:
+                    raise
+                self.stderr.write(f'Error delivering queued emails: {e}')
+                time.sleep(options['poll_interval'])
+                continue
+            if handled:
+                self.stdout.write(f'Handled {handled} queued emails')
+                continue
+            if options['once']:
+                return
+            time.sleep(options['poll_interval'])
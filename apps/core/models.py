@@ -0,0 +1,97 @@
+# apps/core/models.py
+from django.db import models
+
+
+class FieldTrackerMixin:
+    """
+    Remembers the values of `tracked_fields` (attnames, e.g. 'assigned_to_id')
+    as they were loaded from the database, so signal handlers can tell what a
+    save changes without querying the old row again.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._reset_tracked_fields()
+        return instance
+
+    def attnames(self, fields):
+        """
+        Attnames of `fields`, which may be given by name ('assigned_to') as
+        in save(update_fields=...) or by attname ('assigned_to_id').
+        """
+        # Prefetched relations (refresh_from_db(fields=...)) have no attname
+        return {getattr(self._meta.get_field(name), 'attname', name) for name in fields}
+
+    def _reset_tracked_fields(self, fields=None):
+        loaded = getattr(self, '_loaded_values', {})
+        for attname in self.attnames(fields) if fields else self.tracked_fields:
+            # Deferred fields are not in __dict__ and are left untracked.
+            if attname in self.tracked_fields and attname in self.__dict__:
+                loaded[attname] = self.__dict__[attname]
+        self._loaded_values = loaded
+
+    def get_loaded_value(self, attname):
+        """
+        Value of a tracked field in the database before this save.
+        None for rows that have not been saved yet.
+        """
+        if attname in getattr(self, '_loaded_values', {}):
+            return self._loaded_values[attname]
+        if self.pk is None:
+            return None
+        # Instance was built in memory with a pk or the field was deferred.
+        return type(self)._base_manager.filter(pk=self.pk).values_list(attname, flat=True).first()
+
+    def has_changed(self, attname):
+        return self.get_loaded_value(attname) != getattr(self, attname)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save handlers have seen the old values; the row now matches memory.
+        self._reset_tracked_fields(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        # Only the refreshed fields: loading a deferred field goes through
+        # here and must not record unsaved changes to the others as saved.
+        self._reset_tracked_fields(fields)
+
+
+class OutboundEmail(models.Model):
+    """
+    Email waiting to be delivered by the `send_queued_emails` worker.
+    Rows are written in the same transaction as the change that triggers the
+    email, so request handlers never talk to the SMTP server themselves.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('duplicate', 'Duplicate'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    html_template = models.CharField(max_length=255, blank=True)
+    context = models.JSONField(default=dict, blank=True)
+    dedupe_key = models.CharField(max_length=64, db_index=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
@@ -0,0 +1,202 @@
+# apps/core/pagination.py
+"""
+Keyset (cursor) pagination on (created_at, id).
+
+Page-number pagination counts the whole filtered queryset on every request
+and skips rows with OFFSET, so deep pages get slower the further the client
+scrolls. A keyset page instead starts right after the last row of the
+previous one (WHERE (created_at, id) < (...) ORDER BY created_at DESC, id
+DESC LIMIT n), which costs the same on every page with an index on
+(created_at, id).
+
+Viewsets opt in with CursorPaginationMixin; clients pick the mode with
+?pagination=cursor and follow the opaque `next` / `previous` links. Keyset
+pages are always newest first: parameters that order the list otherwise
+(?ordering=, ranked searches) are refused with a 400.
+"""
+import base64
+import json
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first pages keyed on (created_at, id). ?cursor= is the opaque
+    position returned in the previous response, ?page_size= the page size
+    and ?include_total=true adds the planner's row estimate for the filtered
+    queryset as `approximate_count` (no COUNT(*) is run).
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'include_total'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        self.approximate_count = None
+        if request.query_params.get(self.total_query_param, '').lower() in ('1', 'true', 'yes'):
+            self.approximate_count = estimate_count(queryset)
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by('-created_at', '-id')
+        if position is not None:
+            queryset = keyset_filter(queryset, position, reverse)
+
+        # One extra row tells whether there is another page in this direction
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self.previous_position = None
+        if results:
+            first, last = results[0], results[-1]
+            if has_more or reverse:
+                self.next_position = (last.created_at, last.pk)
+            if position is not None and (has_more or not reverse):
+                self.previous_position = (first.created_at, first.pk)
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """
+        (position, reverse) of the ?cursor= parameter, position being a
+        (created_at, id) pair or None for the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            created_at = parse_datetime(data['c'])
+            pk = int(data['i'])
+            reverse = bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), reverse
+
+    def encode_cursor(self, position, reverse=False):
+        created_at, pk = position
+        data = {'c': created_at.isoformat(), 'i': pk}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.approximate_count is not None:
+            payload['approximate_count'] = self.approximate_count
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'approximate_count': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+def keyset_filter(queryset, position, reverse=False):
+    """
+    Rows of `queryset` after the (created_at, id) `position` in newest-first
+    order, or before it with `reverse`.
+    """
+    created_at, pk = position
+    # created_at <= x AND (created_at < x OR id < y) is the row comparison
+    # (created_at, id) < (x, y) written so that created_at is an index range
+    if reverse:
+        return queryset.filter(Q(created_at__gte=created_at), Q(created_at__gt=created_at) | Q(id__gt=pk))
+    return queryset.filter(Q(created_at__lte=created_at), Q(created_at__lt=created_at) | Q(id__lt=pk))
+
+
+def estimate_count(queryset):
+    """
+    The PostgreSQL planner's estimate of the number of rows in `queryset`,
+    or None on other databases.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class CursorPaginationMixin:
+    """
+    Lets a viewset's list action switch to KeysetPagination with
+    ?pagination=cursor. Without it, the viewset's pagination_class (if any)
+    is used as before. `cursor_conflicting_params` given along with
+    ?pagination=cursor are refused with a 400 rather than silently ignored.
+    """
+    cursor_pagination_class = KeysetPagination
+    pagination_mode_param = 'pagination'
+    # Query parameters that order the list their own way
+    cursor_conflicting_params = (api_settings.ORDERING_PARAM,)
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)
+            if (
+                request is not None
+                and getattr(self, 'action', None) == 'list'
+                and request.query_params.get(self.pagination_mode_param) == 'cursor'
+            ):
+                self._paginator = self.cursor_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
+
+    def paginate_queryset(self, queryset):
+        if isinstance(self.paginator, KeysetPagination):
+            conflicting = [param for param in self.cursor_conflicting_params if self.request.query_params.get(param)]
+            if conflicting:
+                message = f'Cannot be combined with ?{self.pagination_mode_param}=cursor, whose pages are ordered newest first on (created_at, id).'
+                raise ValidationError({param: [message] for param in conflicting})
+        return super().paginate_queryset(queryset)
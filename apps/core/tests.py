@@ -0,0 +1,125 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
+
+from apps.accounts.models import User
+from apps.leads.models import Lead
+from apps.property.models import Property, PropertyType
+from apps.site_visits.models import SiteVisit
+
+from .cache import VersionedCache, cache_stats, user_scope
+from .checks import check_shared_cache
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'core-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = VersionedCache('tests.versioned', (Lead,), timeout=60)
+        self.factory = APIRequestFactory()
+
+    def request(self, query=''):
+        return Request(self.factory.get(f'/api/leads/{query}'))
+
+    def test_get_counts_hits_and_misses(self):
+        key = self.cache.key(self.request(), scope='all')
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, {'count': 1})
+        self.assertEqual(self.cache.get(key), {'count': 1})
+
+        stats = {entry['name']: entry for entry in cache_stats()}['tests.versioned']
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 50.0))
+
+    def test_key_ignores_parameter_order(self):
+        self.assertEqual(
+            self.cache.key(self.request('?status=New&page=2&tags=a&tags=b'), scope='all'),
+            self.cache.key(self.request('?tags=b&page=2&status=New&tags=a'), scope='all'),
+        )
+        self.assertNotEqual(
+            self.cache.key(self.request('?status=New'), scope='all'),
+            self.cache.key(self.request('?status=Lost'), scope='all'),
+        )
+
+    def test_key_is_scoped(self):
+        request = self.request()
+        self.assertNotEqual(self.cache.key(request, scope='user:1'), self.cache.key(request, scope='user:2'))
+
+    def test_user_scope(self):
+        admin = User(pk=1, role='admin')
+        manager = User(pk=2, role='manager')
+        agent = User(pk=3, role='agent')
+        self.assertEqual(user_scope(admin), user_scope(manager))
+        self.assertEqual(user_scope(agent), 'user:3')
+        self.assertNotEqual(user_scope(agent), user_scope(User(pk=4, role='agent')))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CachedListTests(TestCase):
+    """
+    The lead and site visit lists are cached per user scope and dropped by
+    writes to the models they are built from.
+    """
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', role='admin')
+        self.agent = User.objects.create_user(username='agent', email='agent@example.com', password='x', role='agent')
+        self.other_agent = User.objects.create_user(username='other', email='other@example.com', password='x', role='agent')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lead = Lead.objects.create(name='Asha', email='asha@example.com', phone='9876543210', assigned_to=self.agent)
+            self.property = Property.objects.create(
+                title='Tower', property_type=PropertyType.values[0], property_sub_type='Apartment',
+                location='Pune', price=100, area=10, description='-', created_by=self.admin,
+            )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def lead_names(self, client):
+        return [lead['name'] for lead in client.get('/api/leads/').json()['results']]
+
+    # A single process shares its LocMemCache: the ETags use the versions
+    # instead of querying the database (see apps.core.conditional)
+    @mock.patch('apps.core.conditional.cache_is_shared', return_value=True)
+    def test_lead_list_is_served_from_cache(self, cache_is_shared):
+        client = self.client_for(self.admin)
+        first = client.get('/api/leads/', {'status': 'New', 'page': 1})
+        with self.assertNumQueries(0):
+            second = client.get('/api/leads/', {'page': 1, 'status': 'New'})
+        self.assertEqual(first.json(), second.json())
+
+    def test_lead_list_scopes_do_not_leak(self):
+        self.assertEqual(self.lead_names(self.client_for(self.agent)), ['Asha'])
+        self.assertEqual(self.lead_names(self.client_for(self.other_agent)), [])
+
+    def test_lead_write_invalidates_list(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(self.lead_names(client), ['Asha'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lead.name = 'Asha K'
+            self.lead.save()
+        self.assertEqual(self.lead_names(client), ['Asha K'])
+
+    def test_site_visit_write_invalidates_list(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(client.get('/api/site-visits/').json(), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteVisit.objects.create(property=self.property, client_user=self.agent, date=date.today(), time='10:00')
+        self.assertEqual(len(client.get('/api/site-visits/').json()), 1)
+
+
+class SharedCacheCheckTests(TestCase):
+    def test_per_process_cache_warns(self):
+        with override_settings(CACHES=LOCMEM_CACHE):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['core.W001'])
+
+    def test_shared_cache_passes(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'crm_cache'}}):
+            self.assertEqual(check_shared_cache(None), [])
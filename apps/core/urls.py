@@ -0,0 +1,10 @@
+# apps/core/urls.py
+from django.urls import path
+
+from .views import CacheStatsView
+
+app_name = 'core'
+
+urlpatterns = [
+    path('cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
+]
@@ -0,0 +1,23 @@
+# apps/core/views.py
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.accounts.permission import IsAdmin
+
+from .cache import cache_stats
+
+
+class CacheStatsView(APIView):
+    """
+    Hit and miss counts of the versioned read caches (admin only).
+    DELETE resets the counters.
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+    def delete(self, request):
+        cache_stats(reset=True)
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,7 +1,7 @@
 # apps/leads/admin.py
 
 from django.contrib import admin
-from .models import Lead
+from .models import Lead, LeadImportJob
 
 @admin.register(Lead)
 class LeadAdmin(admin.ModelAdmin):
@@ -16,4 +16,11 @@ class LeadAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         if not change:  # If creating a new object
             obj.created_by = request.user
-        obj.save()
\ No newline at end of file
+        obj.save()
+
+
+@admin.register(LeadImportJob)
+class LeadImportJobAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'status', 'rows_processed', 'created_count', 'skipped_count', 'created_by', 'created_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_at', 'updated_at', 'started_at', 'finished_at')
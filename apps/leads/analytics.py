@@ -0,0 +1,169 @@
+# apps/leads/analytics.py
+"""
+Per-agent lead statistics for the team_performance endpoint, and the
+converted revenue series of revenue_overview.
+"""
+from datetime import datetime, time, timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth
+from django.utils import timezone
+
+from .models import Lead, LeadDailyRollup
+from .rollup import rollup_enabled
+
+User = get_user_model()
+
+# ?window= values of team_performance; None means all time.
+TEAM_PERFORMANCE_WINDOWS = {
+    'week': timedelta(days=7),
+    'month': timedelta(days=30),
+    'quarter': timedelta(days=90),
+    'year': timedelta(days=365),
+    'all': None,
+}
+AGENT_FIELDS = ('id', 'first_name', 'last_name', 'username', 'profile_image')
+
+# ?time_range= values of revenue_overview: (how far back, grouped by day).
+# None goes back to the first of the current month.
+REVENUE_TIME_RANGES = {
+    'this_month': (None, True),
+    '3_months': (relativedelta(months=3), True),
+    '6_months': (relativedelta(months=6), False),
+    'year': (relativedelta(years=1), False),
+}
+
+
+def team_stats(since=None):
+    """
+    total_leads, converted_leads, conversion_rate and revenue for every agent.
+    With `since`, lead counts cover leads created since then and revenue the
+    leads converted (last updated) since then, like the daily rollup.
+    """
+    if rollup_enabled():
+        return _team_stats_from_rollup(since)
+    return _team_stats_from_leads(since)
+
+
+def _team_stats_from_leads(since):
+    """
+    Leads are aggregated once per assigned_to_id in a derived table that is
+    LEFT JOINed to the agents, instead of joining every lead to its agent and
+    grouping by all user columns.
+    """
+    converted = Q(status='Converted')
+    leads = Lead.objects.order_by().filter(assigned_to__isnull=False)
+    if since is None:
+        lead_stats = leads.values('assigned_to_id').annotate(
+            total_leads=Count('id'),
+            converted_leads=Count('id', filter=converted),
+            revenue=Sum('budget_amount', filter=converted),
+        )
+    else:
+        created = Q(created_at__gte=since)
+        converted_in_window = converted & Q(updated_at__gte=since)
+        lead_stats = leads.filter(created | converted_in_window).values('assigned_to_id').annotate(
+            total_leads=Count('id', filter=created),
+            converted_leads=Count('id', filter=created & converted),
+            revenue=Sum('budget_amount', filter=converted_in_window),
+        )
+    lead_stats_sql, lead_stats_params = lead_stats.query.sql_with_params()
+    agents_sql, agents_params = (
+        User.objects.order_by().filter(role__iexact='agent').values(*AGENT_FIELDS).query.sql_with_params()
+    )
+
+    quote = connection.ops.quote_name
+    sql = (
+        f'SELECT agents.*, lead_stats.total_leads, lead_stats.converted_leads, lead_stats.revenue '
+        f'FROM ({agents_sql}) agents '
+        f'LEFT JOIN ({lead_stats_sql}) lead_stats ON lead_stats.{quote("assigned_to_id")} = agents.{quote("id")}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, agents_params + lead_stats_params)
+        rows = cursor.fetchall()
+
+    stats = []
+    for row in rows:
+        agent = dict(zip(AGENT_FIELDS, row))
+        total_leads, converted_leads, revenue = row[len(AGENT_FIELDS):]
+        stats.append(_with_rate(agent, total_leads or 0, converted_leads or 0, revenue or 0))
+    return stats
+
+
+def _team_stats_from_rollup(since):
+    agents = list(User.objects.order_by().filter(role__iexact='agent').values(*AGENT_FIELDS))
+    rollup = LeadDailyRollup.objects.order_by().filter(assigned_to_id__in=[agent['id'] for agent in agents])
+    if since is not None:
+        rollup = rollup.filter(day__gte=timezone.localtime(since).date())
+    totals = {
+        row['assigned_to_id']: row
+        for row in rollup.values('assigned_to_id').annotate(
+            total_leads=Sum('lead_count'),
+            converted_leads=Sum('lead_count', filter=Q(status='Converted')),
+            revenue=Sum('converted_revenue'),
+        )
+    }
+    stats = []
+    for agent in agents:
+        row = totals.get(agent['id'], {})
+        stats.append(_with_rate(agent, row.get('total_leads') or 0, row.get('converted_leads') or 0, row.get('revenue') or 0))
+    return stats
+
+
+def _with_rate(agent, total_leads, converted_leads, revenue):
+    return {
+        **agent,
+        'total_leads': total_leads,
+        'converted_leads': converted_leads,
+        'conversion_rate': converted_leads * 100.0 / total_leads if total_leads else 0.0,
+        'revenue': revenue,
+    }
+
+
+def revenue_series(time_range):
+    """
+    [(period, revenue)] of converted leads over `time_range`, per day or per
+    month (dated the first of the month), every period of the range included.
+
+    The periods come from generate_series() LEFT JOINed to the revenue
+    aggregate, so the zero-filled series is a single query. A lead counts on
+    the day it was last updated, from midnight of the first day.
+    """
+    span, group_by_day = REVENUE_TIME_RANGES[time_range]
+    today = timezone.localdate()
+    start = today.replace(day=1) if span is None else today - span
+    first_period = start if group_by_day else start.replace(day=1)
+
+    if rollup_enabled():
+        revenue = (
+            LeadDailyRollup.objects.order_by()
+            .filter(day__gte=start, conversions__gt=0)
+            .annotate(period=F('day') if group_by_day else TruncMonth('day'))
+            .values('period')
+            .annotate(total_revenue=Sum('converted_revenue'))
+        )
+    else:
+        # Served by the (status, updated_at, budget_amount) index
+        revenue = (
+            Lead.objects.order_by()
+            .filter(status='Converted', updated_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+            .annotate(period=TruncDay('updated_at') if group_by_day else TruncMonth('updated_at'))
+            .values('period')
+            .annotate(total_revenue=Sum('budget_amount'))
+        )
+    revenue_sql, revenue_params = revenue.query.sql_with_params()
+
+    quote = connection.ops.quote_name
+    sql = (
+        f'SELECT series.period::date, COALESCE(revenue.{quote("total_revenue")}, 0) '
+        f'FROM generate_series(%s::date, %s::date, %s::interval) AS series(period) '
+        f'LEFT JOIN ({revenue_sql}) revenue ON revenue.{quote("period")}::date = series.period::date '
+        f'ORDER BY series.period'
+    )
+    step = '1 day' if group_by_day else '1 month'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [first_period, today, step, *revenue_params])
+        return cursor.fetchall()
@@ -0,0 +1,53 @@
+# apps/leads/budget.py
+"""
+Parsing of the free-text Lead.budget into the numeric Lead.budget_amount.
+"""
+import re
+from decimal import Decimal
+
+BUDGET_UNITS = {
+    '': 1,
+    'k': 10 ** 3, 'thousand': 10 ** 3,
+    'l': 10 ** 5, 'lac': 10 ** 5, 'lacs': 10 ** 5, 'lakh': 10 ** 5, 'lakhs': 10 ** 5,
+    'm': 10 ** 6, 'mn': 10 ** 6, 'million': 10 ** 6, 'millions': 10 ** 6,
+    'cr': 10 ** 7, 'crore': 10 ** 7, 'crores': 10 ** 7,
+}
+
+# Larger values do not fit Lead.budget_amount (max_digits=14, decimal_places=2)
+BUDGET_AMOUNT_LIMIT = Decimal(10) ** 12
+
+CURRENCY = re.compile(r'₹|\binr\b|\brs\b\.?')
+RANGE_SEPARATOR = re.compile(r'\s*(?:-|–|\bto\b)\s*')
+AMOUNT = re.compile(r'^(\d+(?:\.\d+)?|\.\d+)\s*([a-z]*)\.?$')
+
+
+def parse_budget(budget):
+    """
+    Amount in rupees for budgets like "5000000", "50L", "1.2 Cr",
+    "₹ 45,00,000" or "85 lakhs". A range ("40-50 L", "50 to 60 lakh")
+    gives its midpoint; a unit written only after the range applies to both
+    ends. Returns None when the text is not an amount ("negotiable").
+    """
+    if not budget:
+        return None
+    text = CURRENCY.sub('', str(budget).lower()).replace(',', '').strip()
+    if not text:
+        return None
+
+    parts = RANGE_SEPARATOR.split(text)
+    if len(parts) > 2 or not all(parts):
+        return None
+    matches = [AMOUNT.match(part.strip()) for part in parts]
+    if not all(matches):
+        return None
+    units = [match.group(2) for match in matches]
+    if any(unit not in BUDGET_UNITS for unit in units):
+        return None
+    if len(units) == 2 and not units[0]:
+        units[0] = units[1]
+
+    amounts = [Decimal(match.group(1)) * BUDGET_UNITS[unit] for match, unit in zip(matches, units)]
+    amount = (sum(amounts) / len(amounts)).quantize(Decimal('0.01'))
+    if amount >= BUDGET_AMOUNT_LIMIT:
+        return None
+    return amount
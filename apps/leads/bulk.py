@@ -0,0 +1,83 @@
+# apps/leads/bulk.py
+"""
+Bulk update of leads (the bulk_update endpoint).
+
+The change is applied with a single UPDATE ... WHERE id IN (...), which
+sends no model signals. What the signals would have done per lead is done
+here once for the whole set, from a snapshot of the rows taken (and
+locked) just before the UPDATE: the rollup and property counter deltas,
+the analytics cache invalidation, and one assignment digest per agent
+instead of one email per lead.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_leads_version
+from .counters import apply_property_counter_changes
+from .models import Lead
+from .rollup import ROLLUP_LEAD_FIELDS, apply_rollup_changes
+from .utils import send_lead_bulk_assignment_email
+
+User = get_user_model()
+
+# Lead fields a bulk update may change
+BULK_UPDATE_FIELDS = ('status', 'priority', 'source', 'assigned_to', 'property')
+BULK_UPDATE_LIMIT = 5000
+
+
+class LeadBulkUpdateError(Exception):
+    """
+    Raised when a bulk update is refused as a whole.
+    """
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def bulk_update_leads(queryset, changes):
+    """
+    Set `changes` ({field name: value}, values as validated by
+    LeadSerializer) on every lead of `queryset`, which must carry the
+    user's scope. Returns the ids of the updated leads.
+    """
+    values = {
+        Lead._meta.get_field(name).attname: getattr(value, 'pk', value)
+        for name, value in changes.items()
+    }
+    values['updated_at'] = timezone.now()
+
+    with transaction.atomic():
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:BULK_UPDATE_LIMIT + 1])
+        if len(ids) > BULK_UPDATE_LIMIT:
+            raise LeadBulkUpdateError(f'A bulk update can change at most {BULK_UPDATE_LIMIT} leads.')
+        # Locked through `queryset`: a lead changed since the ids were read
+        # (reassigned away from the agent) is only updated if it still matches
+        before = list(
+            queryset.filter(pk__in=ids).select_for_update(of=('self',)).order_by('pk')
+            .values('pk', 'name', *ROLLUP_LEAD_FIELDS)
+        )
+        Lead.objects.filter(pk__in=[row['pk'] for row in before]).update(**values)
+
+        after = [{**row, **values} for row in before]
+        apply_rollup_changes(
+            removed=[{name: row[name] for name in ROLLUP_LEAD_FIELDS} for row in before],
+            added=[{name: row[name] for name in ROLLUP_LEAD_FIELDS} for row in after],
+        )
+        apply_property_counter_changes(
+            removed=[(row['property_id'], row['status']) for row in before],
+            added=[(row['property_id'], row['status']) for row in after],
+        )
+
+        agent_id = values.get('assigned_to_id')
+        if agent_id:
+            # One digest for the leads the agent did not have yet
+            reassigned = [row['name'] for row in before if row['assigned_to_id'] != agent_id]
+            agent = User.objects.filter(pk=agent_id).first()
+            if reassigned and agent:
+                send_lead_bulk_assignment_email(agent, reassigned)
+        converted = any(row['status'] == 'Converted' for row in before + after)
+        transaction.on_commit(partial(bump_leads_version, revenue=converted))
+    return [row['pk'] for row in before]
@@ -0,0 +1,46 @@
+# apps/leads/cache.py
+"""
+Short-lived caching of lead analytics responses, on the versioned cache of
+apps.core.cache.
+
+Cache keys embed the lead data version, which is bumped whenever a lead is
+written, so a save never leaves a stale dashboard behind, including saves
+made by imports and other management commands: the versions live in the
+shared cache (settings.CACHES). revenue_overview
+only depends on converted leads and has a version of its own, bumped only
+by writes that touch one.
+"""
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.core.cache import VersionedCache, bump_version
+
+from .models import Lead
+
+User = get_user_model()
+
+REVENUE_VERSION = 'leads.lead:converted'
+DASHBOARD_CACHE_TTL = 30  # seconds
+REVENUE_CACHE_TTL = 60 * 60  # seconds
+
+# Agent names and avatars are part of team_performance and the assignee facet
+TEAM_PERFORMANCE_CACHE = VersionedCache('leads:team_performance', (Lead, User), DASHBOARD_CACHE_TTL)
+DASHBOARD_STATS_CACHE = VersionedCache('leads:dashboard_stats', (Lead,), DASHBOARD_CACHE_TTL)
+FACETS_CACHE = VersionedCache('leads:facets', (Lead, User), DASHBOARD_CACHE_TTL)
+# The same for every user, as revenue_overview is not scoped
+REVENUE_CACHE = VersionedCache('leads:revenue_overview', (REVENUE_VERSION,), REVENUE_CACHE_TTL, scope=None)
+
+
+def bump_leads_version(revenue=True):
+    """
+    Invalidate the cached lead reads. `revenue=False` keeps revenue_overview,
+    for writes known not to touch a converted lead.
+    """
+    bump_version(Lead)
+    if revenue:
+        bump_version(REVENUE_VERSION)
+
+
+def revenue_cache_key(request, time_range):
+    # Renewed daily, as the periods of a range move with the current date
+    return REVENUE_CACHE.key(request, params={'time_range': time_range, 'day': timezone.localdate().isoformat()})
@@ -0,0 +1,84 @@
+# apps/leads/counters.py
+"""
+Per-property lead counters (Property.lead_count, visit_count and
+conversion_count) read by the builder_performance endpoint.
+
+Counters are adjusted with F() updates in the same transaction as the lead
+write, so concurrent writers never overwrite each other's increments. The
+updates also set updated_at, which validates the property ETags.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from apps.property.models import Property
+
+VISIT_STATUSES = ('Site Visit Done', 'Site Visit Scheduled')
+COUNTER_FIELDS = ('lead_count', 'visit_count', 'conversion_count')
+
+
+def property_counts(status):
+    """Counter increments for one lead in `status`."""
+    counts = Counter(lead_count=1)
+    if status in VISIT_STATUSES:
+        counts['visit_count'] += 1
+    if status == 'Converted':
+        counts['conversion_count'] += 1
+    return counts
+
+
+def apply_property_counter_changes(removed=(), added=()):
+    """
+    Take the (property_id, status) pairs in `removed` off the counters and
+    add those in `added`. Properties whose net change is zero are not written.
+    """
+    deltas = defaultdict(Counter)
+    for sign, leads in ((-1, removed), (1, added)):
+        for property_id, status in leads:
+            if property_id is None:
+                continue
+            for field, amount in property_counts(status).items():
+                deltas[property_id][field] += sign * amount
+
+    deltas = {property_id: delta for property_id, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+    # One UPDATE for all properties, each counter moving by its own amount
+    changes = {}
+    for field in COUNTER_FIELDS:
+        whens = [When(pk=property_id, then=Value(delta[field])) for property_id, delta in deltas.items() if delta[field]]
+        if whens:
+            changes[field] = F(field) + Case(*whens, default=Value(0))
+    Property.objects.filter(pk__in=deltas).update(**changes, updated_at=timezone.now())
+
+
+def live_property_counts():
+    """Property queryset annotated with counts computed from the lead table."""
+    return Property.objects.order_by().annotate(
+        live_lead_count=Count('lead'),
+        live_visit_count=Count('lead', filter=Q(lead__status__in=VISIT_STATUSES)),
+        live_conversion_count=Count('lead', filter=Q(lead__status='Converted')),
+    )
+
+
+def rebuild_property_counters(batch_size=1000):
+    """
+    Correct the counters of every property whose stored values differ from
+    the lead table. Returns the number of properties updated.
+    """
+    drifted = live_property_counts().filter(
+        ~Q(lead_count=F('live_lead_count'))
+        | ~Q(visit_count=F('live_visit_count'))
+        | ~Q(conversion_count=F('live_conversion_count'))
+    ).only('pk', 'updated_at', *COUNTER_FIELDS)
+
+    now = timezone.now()
+    properties = []
+    for prop in drifted.iterator(chunk_size=batch_size):
+        for field in COUNTER_FIELDS:
+            setattr(prop, field, getattr(prop, f'live_{field}'))
+        prop.updated_at = now
+        properties.append(prop)
+    Property.objects.bulk_update(properties, COUNTER_FIELDS + ('updated_at',), batch_size=batch_size)
+    return len(properties)
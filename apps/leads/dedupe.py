@@ -0,0 +1,24 @@
+# apps/leads/dedupe.py
+"""
+Normalized keys used to recognise the same prospect across lead sources.
+Keep these in step with the SQL backfills in migrations 0010_lead_dedupe_keys
+and 0014_lead_email_key_whitespace.
+"""
+import re
+
+# Characters trimmed around emails: those of the SQL backfills' btrim(), as
+# str.strip() without arguments would also trim Unicode spaces
+EMAIL_PADDING = ' \t\n\r\f\v'
+
+
+def phone_key(phone):
+    """
+    Canonical phone number: its digits without leading zeros, and at most the
+    last 10 of them, so "+91 98765 43210", "098765-43210" and "9876543210"
+    share a key.
+    """
+    return re.sub(r'[^0-9]', '', phone or '').lstrip('0')[-10:]
+
+
+def email_key(email):
+    return (email or '').strip(EMAIL_PADDING).lower()
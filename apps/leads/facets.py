@@ -0,0 +1,85 @@
+# apps/leads/facets.py
+"""
+Sidebar facet counts for the lead list (the facets endpoint).
+
+All facets come from one GROUP BY GROUPING SETS ((status), (source),
+(priority), (assigned_to_id)) query. As usual for facets, the counts of a
+facet ignore that facet's own selection: the selections are not applied
+in WHERE but as match columns, and each facet counts the rows matching the
+selections of the other facets (COUNT(*) FILTER (WHERE ...)).
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import BooleanField, ExpressionWrapper, Q
+
+from .models import Lead
+
+User = get_user_model()
+
+# Facet name (the list filter parameter) -> Lead column
+FACET_COLUMNS = {
+    'status': 'status',
+    'source': 'source',
+    'priority': 'priority',
+    'assigned_to': 'assigned_to_id',
+}
+
+
+def facet_counts(queryset, selected):
+    """
+    {facet: [{'value', 'label', 'count'}], 'total': n} for the leads of
+    `queryset` (already narrowed by every non-facet filter), `selected`
+    being the {facet: value} selections of the request.
+    """
+    matches = {
+        f'{facet}_match': ExpressionWrapper(Q(**{FACET_COLUMNS[facet]: value}), output_field=BooleanField())
+        for facet, value in selected.items()
+    }
+    columns = list(FACET_COLUMNS.values())
+    leads_sql, params = (
+        queryset.order_by().annotate(**matches).values(*columns, *matches).query.sql_with_params()
+    )
+
+    quote = connection.ops.quote_name
+
+    def matching(facets):
+        conditions = [f'leads.{quote(f"{facet}_match")}' for facet in facets if facet in selected]
+        return f'COUNT(*) FILTER (WHERE {" AND ".join(conditions)})' if conditions else 'COUNT(*)'
+
+    select = [f'leads.{quote(column)}' for column in columns]
+    select += [f'GROUPING(leads.{quote(column)})' for column in columns]
+    select += [matching([other for other in FACET_COLUMNS if other != facet]) for facet in FACET_COLUMNS]
+    select.append(matching(FACET_COLUMNS))
+    grouping_sets = ', '.join(f'(leads.{quote(column)})' for column in columns)
+    sql = f'SELECT {", ".join(select)} FROM ({leads_sql}) leads GROUP BY GROUPING SETS ({grouping_sets})'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    facets = {facet: {} for facet in FACET_COLUMNS}
+    total = 0
+    size = len(columns)
+    for row in rows:
+        values, grouping, counts, count_all = row[:size], row[size:2 * size], row[2 * size:3 * size], row[-1]
+        for i, facet in enumerate(FACET_COLUMNS):
+            if grouping[i] == 0:
+                facets[facet][values[i]] = counts[i]
+                if i == 0:
+                    total += count_all
+    return {**{facet: _with_labels(facet, counts) for facet, counts in facets.items()}, 'total': total}
+
+
+def _with_labels(facet, counts):
+    """
+    [{'value', 'label', 'count'}] of one facet: every choice of the field
+    (0 when no lead has it), or the assignees with leads, by count.
+    """
+    if facet == 'assigned_to':
+        users = User.objects.filter(pk__in=[pk for pk in counts if pk is not None]).only('username', 'first_name', 'last_name')
+        labels = {user.pk: user.get_full_name() or user.username for user in users}
+        labels[None] = 'Unassigned'
+        entries = sorted((pk for pk in counts if counts[pk]), key=lambda pk: -counts[pk])
+    else:
+        labels = dict(Lead._meta.get_field(facet).choices)
+        entries = list(labels) + [value for value in counts if value not in labels]
+    return [{'value': value, 'label': labels.get(value, value), 'count': counts.get(value, 0)} for value in entries]
@@ -0,0 +1,486 @@
+# apps/leads/importers.py
+
+import codecs
+import io
+from collections import namedtuple
+from itertools import islice
+
+import logging
+from datetime import timedelta
+
+import pandas as pd
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import bump_leads_version
+from .counters import apply_property_counter_changes
+from .dedupe import email_key, phone_key
+from .models import Lead, LeadImportJob
+from .rollup import apply_rollup_changes, lead_values
+from .utils import send_lead_import_summary_email
+
+logger = logging.getLogger(__name__)
+
+# Columns understood by the importer, in the order they are read from the file.
+LEAD_IMPORT_COLUMNS = [
+    'name', 'email', 'phone', 'status', 'source', 'interest',
+    'priority', 'company', 'position', 'budget', 'timeline',
+    'requirements', 'notes', 'tags'
+]
+REQUIRED_COLUMNS = ('name', 'email', 'phone')
+
+# How rows matching an existing lead (same phone_key or email_key) are handled:
+# 'create' inserts them anyway, 'skip' leaves the existing lead alone and
+# 'upsert' updates it with the row's non-empty values.
+IMPORT_MODES = ('create', 'skip', 'upsert')
+
+# Values used when a cell is left empty (same as the model defaults).
+COLUMN_DEFAULTS = {
+    'status': 'New',
+    'source': 'Website',
+    'priority': 'Medium',
+}
+
+CHOICE_COLUMNS = {
+    'status': Lead.STATUS_CHOICES,
+    'source': Lead.SOURCE_CHOICES,
+    'priority': Lead.PRIORITY_CHOICES,
+}
+
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+PHONE_PATTERN = r'^\+?[0-9][0-9 ().-]{5,18}[0-9]$'
+
+# Number of rows sent to the database per INSERT statement.
+IMPORT_BATCH_SIZE = 1000
+
+# Number of rows read from the uploaded file, validated and inserted at a time.
+# Peak memory of an import depends on this, not on the size of the file.
+IMPORT_CHUNK_SIZE = 5000
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+# Serializes 'skip'/'upsert' imports so two of them cannot both insert the
+# same new prospect (transaction-level Postgres advisory lock key).
+LEAD_DEDUPE_LOCK_ID = 7_340_001
+
+# Background jobs keep at most this many skipped-row details; the counts stay exact.
+MAX_STORED_SKIPPED_DETAILS = 1000
+
+# A running job whose progress has not been updated for this long is assumed
+# to belong to a crashed worker and may be picked up again.
+IMPORT_JOB_STALE_AFTER = timedelta(minutes=10)
+
+_READ_OPTIONS = dict(dtype=str, keep_default_na=False, na_filter=False)
+
+
+class LeadImportError(Exception):
+    """
+    Raised when an uploaded file cannot be imported at all
+    (as opposed to individual rows being skipped).
+    """
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def normalize_columns(df):
+    """
+    Lower-case and strip the column names in place.
+    """
+    df.columns = [str(col).strip().lower() for col in df.columns]
+    return df
+
+
+def check_required_columns(columns):
+    if not all(column in columns for column in REQUIRED_COLUMNS):
+        raise LeadImportError(
+            'Missing essential columns in the file. Required columns include at least: name, email, phone.'
+        )
+
+
+def _detect_csv_encoding(file, block_size=1 << 20):
+    """
+    Check whether the file is valid UTF-8 by decoding it block by block, so a
+    bad byte near the end is found before any chunk has been imported.
+    Falls back to latin1, like the previous reader did.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for block in iter(lambda: file.read(block_size), b''):
+            decoder.decode(block)
+        decoder.decode(b'', final=True)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'latin1'
+    finally:
+        file.seek(0)
+
+
+def _iter_csv_chunks(file, chunk_size):
+    encoding = _detect_csv_encoding(file)
+    # Decode explicitly: pandas does not apply `encoding` to upload file objects.
+    text = io.TextIOWrapper(file, encoding=encoding, newline='')
+    try:
+        yield from pd.read_csv(text, chunksize=chunk_size, **_READ_OPTIONS)
+    finally:
+        # Leave the upload open for the caller; it may be closed already
+        # when an early-terminated generator is finalized.
+        if not text.closed:
+            text.detach()
+
+
+def _cell_to_str(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Phone numbers typed into Excel come back as floats
+        return str(int(value))
+    return str(value)
+
+
+def _iter_xlsx_chunks(file, chunk_size):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise LeadImportError(
+            "Processing .xlsx files requires the 'openpyxl' library. Please install it (`pip install openpyxl`) and try again.",
+            status_code=500
+        )
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise LeadImportError(f"Error reading XLSX file: {str(e)}")
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise pd.errors.EmptyDataError('No columns to parse from file')
+        columns = [_cell_to_str(cell) for cell in header]
+        width = len(columns)
+        while True:
+            chunk = []
+            for row in islice(rows, chunk_size):
+                values = [_cell_to_str(cell) for cell in row[:width]]
+                chunk.append(values + [''] * (width - len(values)))
+            if not chunk:
+                break
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _iter_xls_chunks(file, chunk_size):
+    # xlrd has no streaming mode, but .xls sheets are capped at 65,536 rows.
+    try:
+        df = pd.read_excel(file, engine='xlrd', **_READ_OPTIONS)
+    except ImportError:
+        raise LeadImportError(
+            "Processing .xls files requires the 'xlrd' library. Please install it (`pip install xlrd`) and try again.",
+            status_code=500
+        )
+    except Exception as e:
+        raise LeadImportError(f"Error reading XLS file: {str(e)}")
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def iter_lead_frames(file, file_name, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Read an uploaded CSV/XLSX/XLS file in chunks of at most chunk_size rows.
+
+    Yields (DataFrame, first_row_number) tuples with normalized column names.
+    The required-column check runs on the first chunk, before anything is
+    imported.
+    """
+    file_name_lower = file_name.lower()
+    if file_name_lower.endswith('.csv'):
+        chunks = _iter_csv_chunks(file, chunk_size)
+    elif file_name_lower.endswith('.xlsx'):
+        chunks = _iter_xlsx_chunks(file, chunk_size)
+    elif file_name_lower.endswith('.xls'):
+        chunks = _iter_xls_chunks(file, chunk_size)
+    else:
+        raise LeadImportError('Unsupported file format. Please use CSV, XLSX, or XLS.')
+
+    first_row_number = 2  # row 1 is the header
+    for index, df in enumerate(chunks):
+        normalize_columns(df)
+        if index == 0:
+            check_required_columns(df.columns)
+        yield df, first_row_number
+        first_row_number += len(df)
+
+
+def _max_length(column):
+    field = Lead._meta.get_field(column)
+    return field.max_length
+
+
+def validate_lead_frame(df, first_row_number=2):
+    """
+    Validate a DataFrame of raw (string) rows with vectorized checks.
+
+    Returns a tuple of (valid rows as a clean DataFrame, skipped row details).
+    Empty status/source/priority cells are kept empty in the valid rows.
+    Skipped rows use the same {'row_number', 'errors'} shape as the serializer
+    based importer did. first_row_number is the spreadsheet row of df's first
+    row (2 when the header is row 1).
+    """
+    frame = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for column in LEAD_IMPORT_COLUMNS:
+        if column in df.columns:
+            frame[column] = df[column].fillna('').astype(str).str.strip().to_numpy()
+        else:
+            frame[column] = ''
+
+    # Completely empty rows (e.g. trailing rows of a spreadsheet) are ignored.
+    frame = frame[(frame != '').any(axis=1)].copy()
+
+    errors = {}
+
+    def flag(mask, field, message):
+        for position in frame.index[mask]:
+            text = message(frame.at[position, field]) if callable(message) else message
+            errors.setdefault(position, {}).setdefault(field, []).append(text)
+
+    missing = (frame['name'] == '') | (frame['email'] == '') | (frame['phone'] == '')
+    for position in frame.index[missing]:
+        errors[position] = {'Required fields': ['Name, Email, and Phone are mandatory.']}
+
+    # The remaining checks only apply to rows that have the mandatory values.
+    present = ~missing
+    for column, choices in CHOICE_COLUMNS.items():
+        # Empty cells are valid; they get COLUMN_DEFAULTS when a lead is created
+        valid_values = [value for value, _label in choices] + ['']
+        flag(present & ~frame[column].isin(valid_values), column, lambda value: f'"{value}" is not a valid choice.')
+
+    flag(present & ~frame['email'].str.match(EMAIL_PATTERN), 'email', 'Enter a valid email address.')
+    flag(present & ~frame['phone'].str.match(PHONE_PATTERN), 'phone', 'Enter a valid phone number.')
+
+    for column in LEAD_IMPORT_COLUMNS:
+        max_length = _max_length(column) if column != 'tags' else None
+        if max_length:
+            flag(
+                present & (frame[column].str.len() > max_length), column,
+                f'Ensure this field has no more than {max_length} characters.'
+            )
+
+    skipped_rows_details = [
+        {'row_number': position + first_row_number, 'errors': errors[position]}
+        for position in sorted(errors)
+    ]
+
+    valid = frame.drop(index=list(errors))
+    valid['tags'] = valid['tags'].map(
+        lambda value: [tag.strip() for tag in value.split(',') if tag.strip()]
+    )
+    return valid, skipped_rows_details
+
+
+LeadImportResult = namedtuple('LeadImportResult', ['created', 'updated', 'duplicates', 'skipped_rows_details'])
+
+# Columns written when an import updates an existing lead
+UPSERT_FIELDS = LEAD_IMPORT_COLUMNS + ['budget_amount', 'phone_key', 'email_key', 'updated_at']
+
+
+def _new_lead(record, user):
+    values = {column: record[column] or default for column, default in COLUMN_DEFAULTS.items()}
+    lead = Lead(assigned_to_id=user.pk, created_by_id=user.pk, **{**record, **values})
+    # bulk_create skips Lead.save(), which normally sets these
+    lead.set_derived_fields()
+    return lead
+
+
+def _insert_leads(leads, batch_size):
+    Lead.objects.bulk_create(leads, batch_size=batch_size)
+    # bulk_create sends no post_save signals. Imported leads have no
+    # property, so the property counters are unaffected.
+    apply_rollup_changes(added=[lead_values(lead) for lead in leads])
+
+
+def create_leads(frame, user, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Insert the validated rows with bulk_create inside a single transaction.
+    The leads are assigned to and created by `user`. bulk_create does not send
+    pre_save signals, so no per-lead assignment email is sent, and the
+    analytics rollup is updated here for the whole batch.
+    """
+    leads = [_new_lead(record, user) for record in frame.to_dict('records')]
+    with transaction.atomic():
+        _insert_leads(leads, batch_size)
+        transaction.on_commit(bump_leads_version)
+    return len(leads)
+
+
+def merge_leads(frame, user, mode, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import the validated rows in 'skip' or 'upsert' mode.
+
+    Existing leads with the same phone_key or email_key are found with one
+    indexed query per batch. Rows without a match are inserted with
+    bulk_create; in upsert mode, matched leads get the row's non-empty values
+    in a single bulk_update (the assignee is kept). Rows repeating a prospect
+    earlier in the batch are merged into it the same way.
+    Returns (created_count, updated_count, duplicate_count).
+    """
+    records = frame.to_dict('records')
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [LEAD_DEDUPE_LOCK_ID])
+
+        by_phone, by_email = {}, {}
+        existing = Lead.objects.filter(
+            Q(phone_key__in={phone_key(record['phone']) for record in records}) |
+            Q(email_key__in={email_key(record['email']) for record in records})
+        ).order_by('pk')
+        for lead in existing:
+            # The oldest lead of a prospect wins
+            by_phone.setdefault(lead.phone_key, lead)
+            by_email.setdefault(lead.email_key, lead)
+
+        new_leads, changed, updated_count, duplicate_count = [], {}, 0, 0
+        for record in records:
+            lead = by_phone.get(phone_key(record['phone'])) or by_email.get(email_key(record['email']))
+            if lead is None:
+                lead = _new_lead(record, user)
+                new_leads.append(lead)
+            elif mode == 'skip':
+                duplicate_count += 1
+                continue
+            else:
+                for column, value in record.items():
+                    if value not in ('', []):
+                        setattr(lead, column, value)
+                lead.set_derived_fields()
+                updated_count += 1
+                if lead.pk:
+                    changed[lead.pk] = lead
+            by_phone.setdefault(lead.phone_key, lead)
+            by_email.setdefault(lead.email_key, lead)
+
+        changed = list(changed.values())
+        if changed:
+            now = timezone.now()
+            for lead in changed:
+                lead.updated_at = now
+            Lead.objects.bulk_update(changed, UPSERT_FIELDS, batch_size=batch_size)
+            apply_rollup_changes(
+                removed=[lead_values(lead, loaded=True) for lead in changed],
+                added=[lead_values(lead) for lead in changed],
+            )
+            apply_property_counter_changes(
+                removed=[(lead.get_loaded_value('property_id'), lead.get_loaded_value('status')) for lead in changed],
+                added=[(lead.property_id, lead.status) for lead in changed],
+            )
+        _insert_leads(new_leads, batch_size)
+        transaction.on_commit(bump_leads_version)
+    return len(new_leads), updated_count, duplicate_count
+
+
+def import_lead_frame(df, user, first_row_number=2, mode='create'):
+    """
+    Validate and import a DataFrame of leads. Returns a LeadImportResult.
+    """
+    valid, skipped_rows_details = validate_lead_frame(df, first_row_number=first_row_number)
+    if not len(valid):
+        return LeadImportResult(0, 0, 0, skipped_rows_details)
+    if mode == 'create':
+        return LeadImportResult(create_leads(valid, user), 0, 0, skipped_rows_details)
+    created, updated, duplicates = merge_leads(valid, user, mode)
+    return LeadImportResult(created, updated, duplicates, skipped_rows_details)
+
+
+def import_lead_file(file, file_name, user, chunk_size=IMPORT_CHUNK_SIZE, mode='create'):
+    """
+    Stream an uploaded file through the validator and importer, one chunk
+    at a time. Each chunk is committed on its own, and the skipped-row report
+    is accumulated as the file is read. Returns a LeadImportResult.
+    """
+    if mode not in IMPORT_MODES:
+        raise LeadImportError(f"Invalid import mode. Choose one of: {', '.join(IMPORT_MODES)}.")
+
+    created = updated = duplicates = 0
+    skipped_rows_details = []
+    for df, first_row_number in iter_lead_frames(file, file_name, chunk_size=chunk_size):
+        result = import_lead_frame(df, user, first_row_number=first_row_number, mode=mode)
+        created += result.created
+        updated += result.updated
+        duplicates += result.duplicates
+        skipped_rows_details.extend(result.skipped_rows_details)
+    return LeadImportResult(created, updated, duplicates, skipped_rows_details)
+
+
+def claim_next_import_job(stale_after=IMPORT_JOB_STALE_AFTER):
+    """
+    Lock and mark as running the oldest pending job, or a running job left
+    behind by a crashed worker. Returns None when there is nothing to do.
+    skip_locked lets several workers poll the same table.
+    """
+    with transaction.atomic():
+        job = LeadImportJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status='pending') |
+            Q(status='running', updated_at__lt=timezone.now() - stale_after)
+        ).order_by('created_at').first()
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = job.started_at or timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+    return job
+
+
+def run_import_job(job):
+    """
+    Import the stored file of a job chunk by chunk. The leads of a chunk and
+    the job's progress counters are committed in the same transaction, so a
+    job picked up again after a crash skips the chunks already committed.
+    """
+    try:
+        with job.file.open('rb') as file:
+            frames = iter_lead_frames(file, job.file_name, chunk_size=job.chunk_size)
+            for index, (df, first_row_number) in enumerate(frames):
+                if index < job.chunks_committed:
+                    continue
+                with transaction.atomic():
+                    result = import_lead_frame(
+                        df, job.created_by, first_row_number=first_row_number, mode=job.mode
+                    )
+                    skipped = result.skipped_rows_details
+                    room = MAX_STORED_SKIPPED_DETAILS - len(job.skipped_details)
+                    job.skipped_details = job.skipped_details + skipped[:max(room, 0)]
+                    job.rows_processed += len(df)
+                    job.created_count += result.created
+                    job.updated_count += result.updated
+                    job.duplicate_count += result.duplicates
+                    job.skipped_count += len(skipped)
+                    job.chunks_committed = index + 1
+                    job.save(update_fields=[
+                        'skipped_details', 'rows_processed', 'created_count', 'updated_count',
+                        'duplicate_count', 'skipped_count', 'chunks_committed', 'updated_at'
+                    ])
+    except (LeadImportError, pd.errors.EmptyDataError) as e:
+        return _finish_import_job(job, 'failed', str(e))
+    except Exception as e:
+        logger.exception(f"Lead import job {job.pk} failed")
+        return _finish_import_job(job, 'failed', f'Unexpected error: {str(e)}')
+
+    _finish_import_job(job, 'completed')
+    # The leads are in the database now; the upload is no longer needed.
+    job.file.delete(save=True)
+
+    if job.created_count and job.created_by:
+        try:
+            send_lead_import_summary_email(job.created_by, job.created_count, job.skipped_count, job.file_name)
+        except Exception as e:
+            logger.error(f"Error sending lead import summary email for job {job.pk}: {e}")
+    return job
+
+
+def _finish_import_job(job, status, error=''):
+    job.status = status
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at', 'updated_at'])
+    return job
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.leads.budget import parse_budget
+from apps.leads.cache import bump_leads_version
+from apps.leads.models import Lead
+from apps.leads.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill Lead.budget_amount from the free-text budget in primary key order, one '
+        'transaction per batch, then rebuild the analytics rollup.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-parse every lead, not only those without a budget_amount.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        leads = Lead.objects.exclude(budget='').order_by('pk')
+        if not options['all']:
+            leads = leads.filter(budget_amount__isnull=True)
+
+        last_pk = 0
+        parsed = scanned = 0
+        while True:
+            # Keyset pagination keeps every batch an index range scan
+            batch = list(leads.filter(pk__gt=last_pk).only('pk', 'budget', 'budget_amount')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            changed = []
+            for lead in batch:
+                amount = parse_budget(lead.budget)
+                if amount != lead.budget_amount:
+                    lead.budget_amount = amount
+                    changed.append(lead)
+            with transaction.atomic():
+                Lead.objects.bulk_update(changed, ['budget_amount'])
+            scanned += len(batch)
+            parsed += sum(1 for lead in changed if lead.budget_amount is not None)
+            self.stdout.write(f'{scanned} leads scanned, {parsed} budgets parsed')
+
+        # bulk_update bypasses the signals that keep the rollup's revenue current
+        rows = rebuild_rollup(batch_size=batch_size)
+        bump_leads_version()
+        self.stdout.write(self.style.SUCCESS(f'Done. Rebuilt lead rollup: {rows} rows'))
@@ -0,0 +1,241 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from rest_framework import filters
+from rest_framework.test import APIClient
+
+from apps.accounts.serializers import CustomTokenObtainPairSerializer
+from apps.leads.cache import bump_leads_version
+from apps.leads.models import Lead
+from apps.leads.search import LeadSearchFilter
+from apps.leads.views import LeadViewSet
+
+User = get_user_model()
+
+
+def _admin_user():
+    user = User.objects.filter(role='admin').first() or User.objects.filter(is_superuser=True).first()
+    if user is None:
+        raise CommandError('An admin user is required. Run seed_leads first.')
+    return user
+
+
+def _any_lead():
+    lead = Lead.objects.order_by('pk').first()
+    if lead is None:
+        raise CommandError('No leads found. Run seed_leads first.')
+    return lead
+
+
+def patch_lead(client, state):
+    """PATCH /api/leads/<id>/ without touching the assignee."""
+    if 'lead' not in state:
+        state['lead'] = _any_lead()
+    lead = state['lead']
+    state['priority'] = 'High' if state.get('priority') != 'High' else 'Low'
+    return client.patch(f'/api/leads/{lead.pk}/', {'priority': state['priority']}, format='json')
+
+
+def dashboard_stats(client, state):
+    """GET /api/leads/dashboard_stats/, served from the cache after the first request."""
+    return client.get('/api/leads/dashboard_stats/', {'time_range': 'month'})
+
+
+def dashboard_stats_uncached(client, state):
+    """GET /api/leads/dashboard_stats/ with the cache invalidated before every request."""
+    bump_leads_version()
+    return client.get('/api/leads/dashboard_stats/', {'time_range': 'month'})
+
+
+def team_performance_uncached(client, state):
+    """GET /api/leads/team_performance/ over all leads, cache invalidated before every request."""
+    bump_leads_version()
+    return client.get('/api/leads/team_performance/')
+
+
+def team_performance_quarter_uncached(client, state):
+    """GET /api/leads/team_performance/?window=quarter, cache invalidated before every request."""
+    bump_leads_version()
+    return client.get('/api/leads/team_performance/', {'window': 'quarter'})
+
+
+def revenue_overview_year(client, state):
+    """GET /api/leads/revenue_overview/?time_range=year, served from the cache after the first request."""
+    return client.get('/api/leads/revenue_overview/', {'time_range': 'year'})
+
+
+def revenue_overview_year_uncached(client, state):
+    """GET /api/leads/revenue_overview/?time_range=year with the cache invalidated before every request."""
+    bump_leads_version()
+    return client.get('/api/leads/revenue_overview/', {'time_range': 'year'})
+
+
+def lead_list_cached(client, state):
+    """GET /api/leads/?page_size=100, served from the list cache after the first request."""
+    return client.get('/api/leads/', {'page_size': 100})
+
+
+def _jwt_lead_list(state, claims_user):
+    # A real Bearer token, as force_authenticate() skips authentication
+    if 'jwt_client' not in state:
+        token = CustomTokenObtainPairSerializer.get_token(_admin_user()).access_token
+        state['jwt_client'] = APIClient()
+        state['jwt_client'].credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    with override_settings(JWT_CLAIMS_USER=claims_user):
+        return state['jwt_client'].get('/api/leads/', {'page_size': 100})
+
+
+def lead_list_jwt(client, state):
+    """GET /api/leads/?page_size=100 with a Bearer token, the user read from the users table (cached list)."""
+    return _jwt_lead_list(state, claims_user=False)
+
+
+def lead_list_jwt_claims(client, state):
+    """GET /api/leads/?page_size=100 with a Bearer token and JWT_CLAIMS_USER (cached list)."""
+    return _jwt_lead_list(state, claims_user=True)
+
+
+def token_refresh(client, state):
+    """POST /api/auth/refresh/, rotating the refresh token of the previous request."""
+    if 'refresh' not in state:
+        state['refresh'] = str(CustomTokenObtainPairSerializer.get_token(_admin_user()))
+    response = APIClient().post('/api/auth/refresh/', {'refresh': state['refresh']}, format='json')
+    state['refresh'] = response.data.get('refresh', state['refresh'])
+    return response
+
+
+# The list scenarios below measure the queries and serialization: the list
+# cache is invalidated before every request.
+
+def lead_list(client, state):
+    """GET /api/leads/?page_size=100 in the compact list representation."""
+    bump_leads_version(revenue=False)
+    return client.get('/api/leads/', {'page_size': 100})
+
+
+def lead_list_full(client, state):
+    """GET /api/leads/?page_size=100&fields=all, every field with full users, for comparison."""
+    bump_leads_version(revenue=False)
+    return client.get('/api/leads/', {'page_size': 100, 'fields': 'all'})
+
+
+def lead_list_sparse(client, state):
+    """GET /api/leads/?page_size=100 with the few ?fields= a lead grid shows."""
+    bump_leads_version(revenue=False)
+    return client.get('/api/leads/', {'page_size': 100, 'fields': 'id,name,phone,status,priority,assigned_to_detail,created_at'})
+
+
+SEARCH_TERMS = ['lead 4242', 'acme', 'villa', 'lead12@example', '98765']
+
+
+def search(client, state):
+    """GET /api/leads/?search= through the full-text search_vector."""
+    state['term'] = state.get('term', -1) + 1
+    bump_leads_version(revenue=False)
+    return client.get('/api/leads/', {'search': SEARCH_TERMS[state['term'] % len(SEARCH_TERMS)]})
+
+
+@contextmanager
+def _icontains_search():
+    # The search backend LeadViewSet used before the search_vector column
+    backends, had_fields = LeadViewSet.filter_backends, hasattr(LeadViewSet, 'search_fields')
+    LeadViewSet.filter_backends = [
+        filters.SearchFilter if backend is LeadSearchFilter else backend for backend in backends
+    ]
+    LeadViewSet.search_fields = ['name', 'email', 'phone', 'company', 'interest']
+    try:
+        yield
+    finally:
+        LeadViewSet.filter_backends = backends
+        if not had_fields:
+            del LeadViewSet.search_fields
+
+
+def search_icontains(client, state):
+    """GET /api/leads/?search= with DRF's SearchFilter (icontains over five columns), for comparison."""
+    with _icontains_search():
+        return search(client, state)
+
+
+SCENARIOS = {
+    'patch_lead': patch_lead,
+    'dashboard_stats': dashboard_stats,
+    'dashboard_stats_uncached': dashboard_stats_uncached,
+    'team_performance_uncached': team_performance_uncached,
+    'team_performance_quarter_uncached': team_performance_quarter_uncached,
+    'revenue_overview_year': revenue_overview_year,
+    'revenue_overview_year_uncached': revenue_overview_year_uncached,
+    'lead_list_cached': lead_list_cached,
+    'lead_list_jwt': lead_list_jwt,
+    'lead_list_jwt_claims': lead_list_jwt_claims,
+    'token_refresh': token_refresh,
+    'lead_list': lead_list,
+    'lead_list_full': lead_list_full,
+    'lead_list_sparse': lead_list_sparse,
+    'search': search,
+    'search_icontains': search_icontains,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure query counts and latency of lead API endpoints against the current '
+        'database. Some scenarios write data: run it on a seeded benchmark database, '
+        'e.g. `seed_leads --agents 500 --leads 2000000` for the team_performance scenarios '
+        'or `seed_leads --leads 1000000` for the search scenarios and '
+        '`seed_leads --leads 1000000 --converted-share 1` for the revenue_overview ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help=f'Scenarios to run (default: all). Choices: {", ".join(SCENARIOS)}')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per scenario.')
+
+    def handle(self, *args, **options):
+        names = options['scenarios'] or list(SCENARIOS)
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f'Unknown scenarios: {", ".join(unknown)}')
+
+        setup_test_environment()
+        try:
+            client = APIClient()
+            client.force_authenticate(_admin_user())
+            for name in names:
+                self._run(name, SCENARIOS[name], client, options['repeat'], options['warmup'])
+        finally:
+            teardown_test_environment()
+
+    def _run(self, name, scenario, client, repeat, warmup):
+        state = {}
+        for _ in range(warmup):
+            scenario(client, state)
+
+        timings = []
+        queries = []
+        size = 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = scenario(client, state)
+                if hasattr(response, 'streaming_content'):
+                    size = sum(len(chunk) for chunk in response.streaming_content)
+                else:
+                    size = len(response.content)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(captured.captured_queries))
+            if response.status_code >= 400:
+                raise CommandError(f'{name}: HTTP {response.status_code}')
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))]
+        self.stdout.write(
+            f'{name:<34} queries={max(queries):<4} '
+            f'p50={statistics.median(timings):8.2f}ms p95={p95:8.2f}ms '
+            f'req/s={len(timings) * 1000 / sum(timings):8.1f} bytes={size}'
+        )
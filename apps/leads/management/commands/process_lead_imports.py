@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.leads.importers import IMPORT_JOB_STALE_AFTER, claim_next_import_job, run_import_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued lead import jobs. Runs until stopped unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the jobs that are currently queued and exit.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Seconds to wait before polling again when the queue is empty.'
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=int(IMPORT_JOB_STALE_AFTER.total_seconds()),
+            help='Seconds without progress after which a running job is resumed by this worker.'
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after'])
+        while True:
+            job = claim_next_import_job(stale_after=stale_after)
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            resumed = f' (resuming after chunk {job.chunks_committed})' if job.chunks_committed else ''
+            self.stdout.write(f'Processing import job {job.pk}: {job.file_name}{resumed}')
+            run_import_job(job)
+            self.stdout.write(
+                f'Job {job.pk} {job.status}: {job.rows_processed} rows, '
+                f'{job.created_count} created, {job.skipped_count} skipped'
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.leads.cache import bump_leads_version
+from apps.leads.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the LeadDailyRollup analytics table from the lead table. '
+        'Lead writes made while it runs may be missed; run it when the API is quiet.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollup(batch_size=options['batch_size'])
+        bump_leads_version()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt lead rollup: {rows} rows'))
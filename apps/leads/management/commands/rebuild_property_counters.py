@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.cache import bump_version
+from apps.leads.counters import rebuild_property_counters
+from apps.property.models import Property
+
+
+class Command(BaseCommand):
+    help = 'Recompute Property.lead_count/visit_count/conversion_count where they differ from the lead table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_property_counters(batch_size=options['batch_size'])
+        if updated:
+            # The counters are written with QuerySet.update()
+            bump_version(Property)
+        self.stdout.write(self.style.SUCCESS(f'Updated counters of {updated} properties'))
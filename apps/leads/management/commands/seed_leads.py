@@ -0,0 +1,172 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.leads.counters import rebuild_property_counters
+from apps.leads.models import Lead
+from apps.leads.rollup import rebuild_rollup
+from apps.property.models import Property, PropertyImage, PropertyType
+from apps.site_visits.models import SiteVisit
+
+User = get_user_model()
+
+BUDGETS = ['', '5000000', '7500000.50', '50L', '1.2 Cr', '₹ 45,00,000', '40-50 L', 'negotiable', '85 lakhs']
+TAGS = ['hot', 'nri', 'investor', 'first-home', 'loan', 'cold']
+
+
+@contextmanager
+def _explicit_timestamps(model):
+    """
+    Let bulk_create keep the created_at/updated_at values we generate instead
+    of overwriting them with now().
+    """
+    fields = [field for field in model._meta.concrete_fields if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with synthetic agents, properties, leads and site visits for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leads', type=int, default=100000)
+        parser.add_argument('--agents', type=int, default=20)
+        parser.add_argument('--properties', type=int, default=50)
+        parser.add_argument('--images', type=int, default=3, help='Images per new property.')
+        parser.add_argument('--site-visits', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=730, help='Spread lead creation dates over this many days.')
+        parser.add_argument(
+            '--converted-share', type=float, default=None,
+            help='Share of the leads (0-1) created as Converted. By default every status is equally likely.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        admin, _ = User.objects.get_or_create(
+            username='bench_admin',
+            defaults={'email': 'bench_admin@example.com', 'role': 'admin', 'first_name': 'Bench', 'last_name': 'Admin'},
+        )
+        agents = self._agents(options['agents'])
+        properties = self._properties(options['properties'], options['images'], admin, rng)
+        self.stdout.write(f'{len(agents)} agents, {len(properties)} properties')
+
+        now = timezone.now()
+        statuses = [value for value, _label in Lead.STATUS_CHOICES]
+        sources = [value for value, _label in Lead.SOURCE_CHOICES]
+        priorities = [value for value, _label in Lead.PRIORITY_CHOICES]
+        created = 0
+        total = options['leads']
+        with _explicit_timestamps(Lead):
+            while created < total:
+                batch = []
+                for i in range(created, min(created + options['batch_size'], total)):
+                    created_at = now - timedelta(seconds=rng.randint(0, options['days'] * 86400))
+                    updated_at = min(now, created_at + timedelta(seconds=rng.randint(0, 60 * 86400)))
+                    phone = f'9{rng.randint(100000000, 999999999)}'
+                    budget = rng.choice(BUDGETS)
+                    batch.append(Lead(
+                        name=f'Lead {i}',
+                        email=f'lead{i}@example.com',
+                        phone=phone,
+                        company=rng.choice(['', 'Acme', 'Globex', 'Initech']),
+                        status=self._status(statuses, options['converted_share'], rng),
+                        source=rng.choice(sources),
+                        priority=rng.choice(priorities),
+                        interest=rng.choice(['', '2BHK', '3BHK', 'Villa', 'Plot']),
+                        budget=budget,
+                        requirements='Near school and metro station',
+                        tags=rng.sample(TAGS, rng.randint(0, 3)),
+                        assigned_to=rng.choice(agents) if agents else None,
+                        created_by=admin,
+                        property=rng.choice(properties) if properties and rng.random() < 0.8 else None,
+                        created_at=created_at,
+                        updated_at=updated_at,
+                    ))
+                    # bulk_create skips Lead.save()
+                    batch[-1].set_derived_fields()
+                with transaction.atomic():
+                    Lead.objects.bulk_create(batch)
+                created += len(batch)
+                self.stdout.write(f'{created}/{total} leads')
+
+        self._site_visits(options['site_visits'], agents, properties, admin, options['days'], options['batch_size'], rng)
+
+        # bulk_create bypasses the rollup and property counter signals
+        self.stdout.write(f'{rebuild_rollup(batch_size=options["batch_size"])} lead rollup rows')
+        self.stdout.write(f'{rebuild_property_counters()} property counters updated')
+
+    def _status(self, statuses, converted_share, rng):
+        if converted_share is None:
+            return rng.choice(statuses)
+        if rng.random() < converted_share:
+            return 'Converted'
+        return rng.choice([status for status in statuses if status != 'Converted'])
+
+    def _agents(self, count):
+        existing = {user.username: user for user in User.objects.filter(username__startswith='bench_agent_')}
+        missing = [
+            User(username=f'bench_agent_{i}', email=f'bench_agent_{i}@example.com', role='agent',
+                 first_name='Agent', last_name=str(i))
+            for i in range(count) if f'bench_agent_{i}' not in existing
+        ]
+        User.objects.bulk_create(missing)
+        return list(User.objects.filter(username__startswith='bench_agent_').order_by('pk')[:count])
+
+    def _properties(self, count, images, admin, rng):
+        existing = Property.objects.filter(title__startswith='Bench Project ').count()
+        created = Property.objects.bulk_create([
+            Property(
+                title=f'Bench Project {i}',
+                property_type=rng.choice(PropertyType.values),
+                property_sub_type='Apartment',
+                location='Pune',
+                price=Decimal(rng.randint(30, 300) * 100000),
+                area=Decimal(rng.randint(500, 3000)),
+                description='Synthetic benchmark property',
+                created_by=admin,
+            )
+            for i in range(existing, count)
+        ])
+        PropertyImage.objects.bulk_create([
+            PropertyImage(property=prop, image=f'property_images/bench_{prop.pk}_{i}.jpg', is_primary=(i == 0))
+            for prop in created for i in range(images)
+        ])
+        return list(Property.objects.filter(title__startswith='Bench Project ').order_by('pk')[:count])
+
+    def _site_visits(self, count, agents, properties, client, days, batch_size, rng):
+        if not properties:
+            return
+        today = timezone.localdate()
+        statuses = ['scheduled', 'confirmed', 'completed', 'cancelled', 'no_show']
+        created = 0
+        while created < count:
+            batch = []
+            for _ in range(min(batch_size, count - created)):
+                # Mostly past visits, with a few weeks of upcoming ones
+                date = today + timedelta(days=rng.randint(-days, 30))
+                batch.append(SiteVisit(
+                    property=rng.choice(properties),
+                    agent=rng.choice(agents) if agents else None,
+                    client_user=client,
+                    date=date,
+                    time=f'{rng.randint(9, 18):02d}:{rng.choice(["00", "30"])}',
+                    status=rng.choice(statuses[:2]) if date >= today else rng.choice(statuses[2:]),
+                ))
+            SiteVisit.objects.bulk_create(batch)
+            created += len(batch)
+        self.stdout.write(f'{created} site visits')
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0005_lead_import_job'),
+        ('property', '0006_alter_property_contact_phone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('New', 'New'), ('Contacted', 'Contacted'), ('Site Visit Scheduled', 'Site Visit Scheduled'), ('Site Visit Done', 'Site Visit Done'), ('Qualified', 'Qualified'), ('Proposal', 'Proposal'), ('Negotiation', 'Negotiation'), ('Converted', 'Converted'), ('Dropped', 'Dropped')], max_length=20)),
+                ('source', models.CharField(choices=[('Website', 'Website'), ('WhatsApp', 'WhatsApp'), ('Facebook', 'Facebook'), ('Referral', 'Referral'), ('Direct Call', 'Direct Call'), ('Email', 'Email'), ('Other', 'Other')], max_length=20)),
+                ('lead_count', models.IntegerField(default=0)),
+                ('conversions', models.IntegerField(default=0)),
+                ('converted_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('assigned_to', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('property', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='property.property')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'source', 'assigned_to', 'property'), name='lead_rollup_bucket_unique', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:51
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# Weights: name A, company and interest B, requirements C, notes, email and
+# phone D. The 'simple' configuration does not stem, so prefix matching on
+# names, emails and phone numbers behaves predictably.
+SEARCH_VECTOR_SQL = """
+CREATE FUNCTION leads_lead_search_vector(
+    name text, company text, interest text, requirements text, notes text, email text, phone text
+) RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(company, '') || ' ' || coalesce(interest, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(requirements, '')), 'C')
+        || setweight(to_tsvector('simple', concat_ws(' ',
+            notes, phone,
+            -- the whole address and its parts, so partial emails ("john@exa") match too
+            email, translate(email, '@.', '  ')
+        )), 'D')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE FUNCTION leads_lead_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := leads_lead_search_vector(
+        NEW.name, NEW.company, NEW.interest, NEW.requirements, NEW.notes, NEW.email, NEW.phone
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER leads_lead_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, company, interest, requirements, notes, email, phone
+    ON leads_lead FOR EACH ROW EXECUTE FUNCTION leads_lead_search_vector_trigger();
+
+UPDATE leads_lead SET search_vector = leads_lead_search_vector(
+    name, company, interest, requirements, notes, email, phone
+);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS leads_lead_search_vector_update ON leads_lead;
+DROP FUNCTION IF EXISTS leads_lead_search_vector_trigger();
+DROP FUNCTION IF EXISTS leads_lead_search_vector(text, text, text, text, text, text, text);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0007_lead_budget_amount'),
+        ('property', '0007_property_lead_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+        migrations.AddIndex(
+            model_name='lead',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='lead_search_vector_gin'),
+        ),
+    ]
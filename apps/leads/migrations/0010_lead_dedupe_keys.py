@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Same normalization as apps.leads.dedupe.phone_key/email_key
+BACKFILL_KEYS_SQL = r"""
+UPDATE leads_lead SET
+    phone_key = right(ltrim(regexp_replace(phone, '[^0-9]', '', 'g'), '0'), 10),
+    email_key = lower(btrim(email, E' \t\n\r\f\x0B'));
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0009_lead_contact_trigram'),
+        ('property', '0007_property_lead_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='email_key',
+            field=models.CharField(blank=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='phone_key',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunSQL(BACKFILL_KEYS_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['phone_key'], name='lead_phone_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['email_key'], name='lead_email_key_idx'),
+        ),
+        migrations.AddField(
+            model_name='leadimportjob',
+            name='duplicate_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='leadimportjob',
+            name='mode',
+            field=models.CharField(choices=[('create', 'Create'), ('skip', 'Skip duplicates'), ('upsert', 'Update duplicates')], default='create', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='leadimportjob',
+            name='updated_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
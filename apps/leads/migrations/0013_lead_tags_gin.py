@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-17 05:08
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0012_lead_hot_query_indexes'),
+        ('property', '0008_propertyimage_order_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='lead_tags_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
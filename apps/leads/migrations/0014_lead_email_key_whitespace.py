@@ -0,0 +1,19 @@
+from django.db import migrations
+
+# 0010 trimmed only spaces: recompute the keys of emails padded with other
+# whitespace, as apps.leads.dedupe.email_key does
+BACKFILL_EMAIL_KEYS_SQL = r"""
+UPDATE leads_lead SET email_key = lower(btrim(email, E' \t\n\r\f\x0B'))
+WHERE email_key <> lower(btrim(email, E' \t\n\r\f\x0B'));
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leads', '0013_lead_tags_gin'),
+    ]
+
+    operations = [
+        migrations.RunSQL(BACKFILL_EMAIL_KEYS_SQL, migrations.RunSQL.noop),
+    ]
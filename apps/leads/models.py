@@ -1,8 +1,15 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.conf import settings
 from apps.property.models import Property # <-- ADD THIS IMPORT
+from apps.core.models import FieldTrackerMixin
+from .budget import parse_budget
+from .dedupe import email_key, phone_key
+from .search import PhoneDigits
 
-class Lead(models.Model):
+class Lead(FieldTrackerMixin, models.Model):
     STATUS_CHOICES = [
         ('New', 'New'),
         ('Contacted', 'Contacted'),
@@ -32,6 +39,13 @@ class Lead(models.Model):
         ('Urgent', 'Urgent'),
     ]
 
+    # Original values kept by FieldTrackerMixin for the lead signals: the
+    # assignment email and the LeadDailyRollup deltas.
+    tracked_fields = (
+        'assigned_to_id', 'status', 'source', 'property_id',
+        'budget_amount', 'created_at', 'updated_at',
+    )
+
     # --- ADD THIS FIELD ---
     property = models.ForeignKey(
         Property,
@@ -45,6 +59,10 @@ class Lead(models.Model):
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(max_length=20)
+    # Normalized phone/email (see apps.leads.dedupe), set on save and used to
+    # find existing leads for the same prospect when importing.
+    phone_key = models.CharField(max_length=20, blank=True, editable=False)
+    email_key = models.CharField(max_length=254, blank=True, editable=False)
     company = models.CharField(max_length=255, blank=True)
     position = models.CharField(max_length=255, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='New')
@@ -58,6 +76,9 @@ class Lead(models.Model):
         related_name='assigned_leads'
     )
     budget = models.CharField(max_length=255, blank=True)
+    # `budget` parsed to rupees on save (None if it is not an amount); the
+    # revenue analytics sum this column.
+    budget_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True, editable=False)
     timeline = models.CharField(max_length=255, blank=True)
     requirements = models.TextField(blank=True)
     notes = models.TextField(blank=True)
@@ -72,8 +93,156 @@ class Lead(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Weighted full-text document over name, company, interest, requirements,
+    # notes, email and phone, maintained by a database trigger (see migration
+    # 0008_lead_search_vector) and queried by apps.leads.search.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination (apps.core.pagination)
+            models.Index(fields=['created_at', 'id'], name='lead_created_id_idx'),
+            # An agent's leads, newest first (list, dashboard_stats)
+            models.Index(fields=['assigned_to', 'created_at'], name='lead_assigned_created_idx'),
+            # ?status= lists, newest first
+            models.Index(fields=['status', 'created_at'], name='lead_status_created_idx'),
+            # Leads of a property by status (property lead counters)
+            models.Index(fields=['property', 'status'], name='lead_property_status_idx'),
+            # ?tags= containment queries (apps.leads.tags)
+            GinIndex(fields=['tags'], opclasses=['jsonb_path_ops'], name='lead_tags_gin'),
+            models.Index(fields=['phone_key'], name='lead_phone_key_idx'),
+            models.Index(fields=['email_key'], name='lead_email_key_idx'),
+            GinIndex(fields=['search_vector'], name='lead_search_vector_gin'),
+            # pg_trgm indexes for the ?q_contact= lookup (apps.leads.search)
+            GinIndex(OpClass(Lower('email'), name='gin_trgm_ops'), name='lead_email_trgm'),
+            GinIndex(OpClass(PhoneDigits('phone'), name='gin_trgm_ops'), name='lead_phone_digits_trgm'),
+            # Converted revenue over an updated_at range, summed from the index
+            models.Index(fields=['status', 'updated_at', 'budget_amount'], name='lead_status_updated_budget_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - {self.status}"
+
+    # Columns derived from other fields on save: {source field: derived fields}
+    DERIVED_FIELDS = {
+        'budget': ('budget_amount',),
+        'phone': ('phone_key',),
+        'email': ('email_key',),
+    }
+
+    def set_derived_fields(self):
+        self.budget_amount = parse_budget(self.budget)
+        self.phone_key = phone_key(self.phone)
+        self.email_key = email_key(self.email)
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields,
+                *(derived for source, fields in self.DERIVED_FIELDS.items() if source in update_fields for derived in fields),
+            }
+        # The pre_save assignment signal writes to the email outbox; keep that
+        # row in the same transaction as the lead itself.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class LeadImportJob(models.Model):
+    """
+    A lead file import that is processed in the background by the
+    `process_lead_imports` management command.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    MODE_CHOICES = [
+        ('create', 'Create'),
+        ('skip', 'Skip duplicates'),
+        ('upsert', 'Update duplicates'),
+    ]
+
+    file = models.FileField(upload_to='lead_imports/', blank=True)
+    file_name = models.CharField(max_length=255)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='create')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='lead_import_jobs'
+    )
+
+    # Progress, committed together with each chunk of inserted leads so an
+    # interrupted job can resume after the last committed chunk.
+    chunk_size = models.PositiveIntegerField(default=5000)
+    chunks_committed = models.PositiveIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    skipped_details = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.name} - {self.status}"
\ No newline at end of file
+        return f"{self.file_name} - {self.status}"
+
+
+class LeadDailyRollup(models.Model):
+    """
+    Per-day lead totals read by the analytics endpoints instead of scanning
+    the lead table. Maintained incrementally by apps.leads.rollup and rebuilt
+    from scratch by the `rebuild_lead_rollup` management command.
+
+    lead_count is bucketed by the day a lead was created; conversions and
+    converted_revenue by the day a converted lead was last updated.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Lead.STATUS_CHOICES)
+    source = models.CharField(max_length=20, choices=Lead.SOURCE_CHOICES)
+    # Plain references without database constraints: rows for deleted users
+    # or properties are cleaned up by the next rebuild.
+    assigned_to = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+'
+    )
+    property = models.ForeignKey(
+        Property,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        related_name='+'
+    )
+
+    lead_count = models.IntegerField(default=0)
+    conversions = models.IntegerField(default=0)
+    converted_revenue = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'status', 'source', 'assigned_to', 'property'],
+                name='lead_rollup_bucket_unique',
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status}/{self.source}: {self.lead_count}"
@@ -40,7 +40,7 @@ class IsOwnerOrAssignedOrAdmin(permissions.BasePermission):
             return True
         
         # Check if the user is the one assigned to the lead
-        return obj.assigned_to == request.user
+        return obj.assigned_to_id == request.user.pk
 
     def has_permission(self, request, view):
         # This check is for list/create views or actions not tied to a specific object yet.
@@ -0,0 +1,188 @@
+# apps/leads/rollup.py
+"""
+Daily lead rollup for the analytics endpoints.
+
+Each lead contributes to at most two LeadDailyRollup rows keyed by
+(day, status, source, assigned_to, property):
+
+- lead_count, on the day the lead was created;
+- conversions and converted_revenue, on the day a converted lead was last
+  updated (the same conversion date revenue_overview has always used).
+
+The lead signals, the importer and the bulk update apply the difference
+between a lead's old and new contributions, so the table stays current
+without rescanning leads.
+Writes that bypass signals (QuerySet.update(), or the SET_NULL cascade when a
+user or property is deleted) are picked up by `rebuild_lead_rollup`.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Lead, LeadDailyRollup
+
+# Lead fields a rollup contribution depends on (see Lead.tracked_fields).
+ROLLUP_LEAD_FIELDS = ('status', 'source', 'assigned_to_id', 'property_id', 'budget_amount', 'created_at', 'updated_at')
+ROLLUP_DIMENSIONS = ('status', 'source', 'assigned_to_id', 'property_id')
+
+# Query parameters that can be answered from the rollup. Any other filter
+# (priority, search, ...) needs the lead table.
+ROLLUP_QUERY_PARAMS = ('status', 'source', 'assigned_to', 'time_range', 'ordering', 'page', 'page_size')
+
+ZERO = Decimal('0')
+ROLLUP_UPSERT_BATCH_SIZE = 500
+
+
+def rollup_enabled():
+    return getattr(settings, 'LEAD_ANALYTICS_USE_ROLLUP', False)
+
+
+def _local_day(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def lead_contributions(values):
+    """
+    Rollup rows touched by one lead, given a dict of its ROLLUP_LEAD_FIELDS:
+    {(day, status, source, assigned_to_id, property_id): [lead_count, conversions, revenue]}
+    """
+    dimensions = tuple(values[name] for name in ROLLUP_DIMENSIONS)
+    rows = defaultdict(lambda: [0, 0, ZERO])
+    rows[(_local_day(values['created_at']),) + dimensions][0] += 1
+    if values['status'] == 'Converted':
+        row = rows[(_local_day(values['updated_at']),) + dimensions]
+        row[1] += 1
+        row[2] += values['budget_amount'] or ZERO
+    return rows
+
+
+def lead_values(lead, loaded=False, update_fields=None):
+    """
+    ROLLUP_LEAD_FIELDS of a Lead instance, either as saved by the current
+    save or (loaded=True) as they were in the database before it. Fields left
+    out of a save's `update_fields` keep their loaded values.
+    """
+    return {
+        name: lead.get_loaded_value(name) if loaded or not _saved(lead, name, update_fields) else getattr(lead, name)
+        for name in ROLLUP_LEAD_FIELDS
+    }
+
+
+def _saved(lead, attname, update_fields):
+    return update_fields is None or attname in lead.attnames(update_fields)
+
+
+def apply_rollup_changes(removed=(), added=()):
+    """
+    Subtract the contributions of the `removed` lead values and add those of
+    the `added` ones. Buckets whose net change is zero are not written.
+    """
+    deltas = defaultdict(lambda: [0, 0, ZERO])
+    for sign, snapshots in ((-1, removed), (1, added)):
+        for values in snapshots:
+            for key, contribution in lead_contributions(values).items():
+                delta = deltas[key]
+                for i, amount in enumerate(contribution):
+                    delta[i] += sign * amount
+
+    rows = sorted(
+        (key + tuple(delta) for key, delta in deltas.items() if any(delta)),
+        key=lambda row: tuple(str(value) for value in row[:len(ROLLUP_DIMENSIONS) + 1]),
+    )
+    with transaction.atomic(savepoint=False):
+        for start in range(0, len(rows), ROLLUP_UPSERT_BATCH_SIZE):
+            _upsert_deltas(rows[start:start + ROLLUP_UPSERT_BATCH_SIZE])
+
+
+def _upsert_deltas(rows):
+    # INSERT ... ON CONFLICT adds the deltas to existing buckets in one
+    # statement, and atomically with concurrent writers creating the bucket.
+    # Rows are sorted so concurrent upserts lock buckets in the same order.
+    table = LeadDailyRollup._meta.db_table
+    quote = connection.ops.quote_name
+    counts = ('lead_count', 'conversions', 'converted_revenue')
+    columns = ('day',) + ROLLUP_DIMENSIONS + counts
+    increments = ', '.join(
+        f'{quote(column)} = {quote(table)}.{quote(column)} + EXCLUDED.{quote(column)}' for column in counts
+    )
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    sql = (
+        f'INSERT INTO {quote(table)} ({", ".join(map(quote, columns))}) VALUES {placeholders} '
+        f'ON CONFLICT ON CONSTRAINT {quote("lead_rollup_bucket_unique")} DO UPDATE SET {increments}'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def rebuild_rollup(batch_size=5000):
+    """
+    Recompute the whole rollup from the lead table. Returns the number of
+    rollup rows written.
+    """
+    buckets = defaultdict(lambda: [0, 0, ZERO])
+
+    created = (
+        Lead.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('day', *ROLLUP_DIMENSIONS)
+        .annotate(lead_count=Count('id'))
+    )
+    for row in created.iterator(chunk_size=batch_size):
+        buckets[(row['day'],) + tuple(row[name] for name in ROLLUP_DIMENSIONS)][0] += row['lead_count']
+
+    converted = (
+        Lead.objects.filter(status='Converted').order_by()
+        .annotate(day=TruncDate('updated_at'))
+        .values('day', *ROLLUP_DIMENSIONS)
+        .annotate(conversions=Count('id'), revenue=Coalesce(Sum('budget_amount'), ZERO))
+    )
+    for row in converted.iterator(chunk_size=batch_size):
+        bucket = buckets[(row['day'],) + tuple(row[name] for name in ROLLUP_DIMENSIONS)]
+        bucket[1] += row['conversions']
+        bucket[2] += row['revenue']
+
+    rows = (
+        LeadDailyRollup(
+            **dict(zip(('day',) + ROLLUP_DIMENSIONS, key)),
+            lead_count=lead_count, conversions=conversions, converted_revenue=revenue,
+        )
+        for key, (lead_count, conversions, revenue) in buckets.items()
+    )
+    with transaction.atomic():
+        LeadDailyRollup.objects.all().delete()
+        LeadDailyRollup.objects.bulk_create(rows, batch_size=batch_size)
+    return len(buckets)
+
+
+def rollup_queryset(request):
+    """
+    Rollup rows matching the leads the user may see and the request's
+    filters, or None when the request filters on something the rollup does
+    not keep.
+    """
+    params = request.query_params
+    if any(key not in ROLLUP_QUERY_PARAMS for key in params):
+        return None
+
+    queryset = LeadDailyRollup.objects.order_by()
+    user = request.user
+    if not (user.is_superuser or getattr(user, 'role', None) in ['admin', 'manager']):
+        queryset = queryset.filter(assigned_to_id=user.pk)
+
+    for name in ('status', 'source'):
+        if params.get(name):
+            queryset = queryset.filter(**{name: params[name]})
+    assigned_to = params.get('assigned_to')
+    if assigned_to:
+        if not assigned_to.isdigit():
+            return None
+        queryset = queryset.filter(assigned_to_id=int(assigned_to))
+    return queryset
+
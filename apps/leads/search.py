@@ -0,0 +1,95 @@
+# apps/leads/search.py
+"""
+Lead search backends: full-text search on the trigger-maintained
+Lead.search_vector column (?search=) and trigram contact lookup on phone and
+email (?q_contact=).
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, Func, Q
+from django.db.models.functions import Lower
+from rest_framework import filters
+
+SEARCH_CONFIG = 'simple'  # must match the configuration used by the trigger
+
+
+def prefix_search_query(terms):
+    """
+    SearchQuery matching leads that contain every term as a word prefix, so
+    "joh smi" finds "John Smith" and "98765" finds "9876543210".
+    Terms are quoted as tsquery lexemes and cannot inject query operators.
+    """
+    lexemes = ["'{}':*".format(term.lower().replace('\\', '').replace("'", "''")) for term in terms]
+    return SearchQuery(' & '.join(lexemes), config=SEARCH_CONFIG, search_type='raw')
+
+
+class LeadSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on leads (same ?search= parameter):
+    matches against the GIN-indexed search_vector instead of running
+    icontains over several columns. Unless the request asks for an explicit
+    ?ordering=, results are ordered by relevance. List it after
+    OrderingFilter so the ranking is not overridden by the default ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = [term for term in self.get_search_terms(request) if term.strip("'\\")]
+        if not terms:
+            return queryset
+
+        query = prefix_search_query(terms)
+        queryset = queryset.filter(search_vector=query)
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-created_at')
+
+
+class PhoneDigits(Func):
+    """
+    The digits of a phone number. Queries must use this exact expression to
+    hit the trigram index on Lead.phone.
+    """
+    function = 'REGEXP_REPLACE'
+    template = "%(function)s(%(expressions)s, '[^0-9]', '', 'g')"
+
+
+# Input that only contains these characters is looked up as a phone number
+PHONE_INPUT = re.compile(r'^[0-9+()\s.-]+$')
+
+
+class LeadContactFilter(filters.BaseFilterBackend):
+    """
+    ?q_contact= looks a lead up by partial or misspelled phone number or
+    email through pg_trgm GIN indexes on the digits of the phone and the
+    lower-cased email: substring matches and trigram-similar values, best
+    matches first (unless ?ordering= is given). Like LeadSearchFilter, list
+    it after OrderingFilter.
+    """
+    contact_param = 'q_contact'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.contact_param, '').strip()
+        if not term:
+            return queryset
+
+        if PHONE_INPUT.match(term):
+            digits = re.sub(r'[^0-9]', '', term)
+            if not digits:
+                return queryset.none()
+            queryset = queryset.annotate(contact=PhoneDigits('phone')).filter(
+                Q(contact__contains=digits) | Q(contact__trigram_similar=digits)
+            )
+            similarity = TrigramSimilarity('contact', digits)
+        else:
+            email = term.lower()
+            queryset = queryset.annotate(contact=Lower('email')).filter(
+                Q(contact__contains=email) | Q(contact__trigram_similar=email)
+            )
+            similarity = TrigramSimilarity('contact', email)
+
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.annotate(contact_similarity=similarity).order_by('-contact_similarity', '-created_at')
@@ -1,16 +1,78 @@
 from rest_framework import serializers
-from .models import Lead
-from apps.accounts.serializers import UserSerializer
+from .models import Lead, LeadImportJob
+from apps.accounts.serializers import UserSerializer, UserSummarySerializer
 
 class LeadSerializer(serializers.ModelSerializer):
+    """
+    Full lead representation by default. Reads can narrow it:
+
+    - `fields`: only these keys are serialized;
+    - `compact`: the list representation, with user summaries instead of
+      full users in the *_detail fields and, unless `fields` asks for them,
+      without the long text fields;
+    - `expand`: relations ('assigned_to', 'created_by') whose full user is
+      serialized in any case.
+
+    restrict_queryset() then loads only the columns the remaining fields read.
+    """
     assigned_to_detail = UserSerializer(source='assigned_to', read_only=True)
     created_by_detail = UserSerializer(source='created_by', read_only=True)
 
+    # ?expand= names and the fields that serialize their related user
+    EXPANDABLE_FIELDS = {'assigned_to': 'assigned_to_detail', 'created_by': 'created_by_detail'}
+    # Left out of the compact list representation
+    LONG_TEXT_FIELDS = ('requirements', 'notes')
+
     class Meta:
         model = Lead
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('created_by', 'created_at', 'updated_at')
 
+    def __init__(self, *args, fields=None, expand=(), compact=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        if compact:
+            if fields is None:
+                for name in self.LONG_TEXT_FIELDS:
+                    self.fields.pop(name)
+            for relation, name in self.EXPANDABLE_FIELDS.items():
+                if relation not in expand:
+                    self.fields[name] = UserSummarySerializer(source=relation, read_only=True)
+        if fields is not None:
+            keep = set(fields) | {self.EXPANDABLE_FIELDS[relation] for relation in expand}
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+    def restrict_queryset(self, queryset):
+        """
+        `queryset` loading only the columns read by the serialized fields
+        (plus the owner columns the object permissions check and updated_at
+        for the ETag), and joining only the users that are serialized.
+        """
+        model_fields = {field.name for field in Lead._meta.concrete_fields}
+        columns = {'id', 'assigned_to', 'created_by', 'updated_at'}
+        related = []
+        for field in self.fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.BaseSerializer):
+                related.append(field.source)
+                columns.update(f'{field.source}__{nested.source}' for nested in field.fields.values())
+            elif field.source in model_fields:
+                columns.add(field.source)
+        return queryset.select_related(None).select_related(*related).only(*columns)
+
     def create(self, validated_data):
-        validated_data['created_by'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        validated_data['created_by_id'] = self.context['request'].user.pk
+        return super().create(validated_data)
+
+
+class LeadImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = LeadImportJob
+        fields = (
+            'id', 'file_name', 'mode', 'status', 'rows_processed', 'created_count', 'updated_count',
+            'duplicate_count', 'skipped_count',
+            'skipped_details', 'error', 'created_at', 'updated_at', 'started_at', 'finished_at'
+        )
+        read_only_fields = fields
@@ -1,7 +1,13 @@
-from django.db.models.signals import pre_save
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from .models import Lead
 from .utils import send_lead_assignment_email
+from .cache import bump_leads_version
+from .rollup import apply_rollup_changes, lead_values
+from .counters import apply_property_counter_changes
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -10,18 +16,64 @@ User = get_user_model()
 def handle_lead_assignment(sender, instance, **kwargs):
     """
     Signal handler to send email notifications when a lead is assigned to an agent.
+    The previous assignee comes from the values tracked when the lead was
+    loaded, so this does not query the database.
     """
-    try:
-        # If this is a new lead, old_instance won't exist
-        old_instance = Lead.objects.get(pk=instance.pk)
-        old_assigned_to = old_instance.assigned_to
-    except Lead.DoesNotExist:
-        old_assigned_to = None
-    
-    new_assigned_to = instance.assigned_to
+    new_assigned_to_id = instance.assigned_to_id
     
     # Send email if:
-    # 1. Lead is newly assigned (old_assigned_to was None)
+    # 1. Lead is newly assigned (the old assignee was None)
     # 2. Lead is reassigned to a different agent
-    if new_assigned_to and (old_assigned_to != new_assigned_to):
-        send_lead_assignment_email(instance, new_assigned_to)
+    if new_assigned_to_id and instance.get_loaded_value('assigned_to_id') != new_assigned_to_id:
+        send_lead_assignment_email(instance, instance.assigned_to)
+
+
+@receiver(post_save, sender=Lead)
+@receiver(post_delete, sender=Lead)
+def invalidate_lead_analytics(sender, instance, **kwargs):
+    """
+    Invalidate cached analytics once the change is committed, so no request
+    can cache the old data under the new version. The revenue cache only
+    when the lead is or was converted.
+    """
+    converted = 'Converted' in (instance.status, instance.get_loaded_value('status'))
+    transaction.on_commit(partial(bump_leads_version, revenue=converted))
+
+
+@receiver(post_save, sender=Lead)
+def update_lead_rollup_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Move the lead's contribution to LeadDailyRollup from its old values
+    (as loaded) to its new ones, in the same transaction as the save.
+    """
+    if raw:
+        return
+    removed = [] if created else [lead_values(instance, loaded=True)]
+    apply_rollup_changes(removed, [lead_values(instance, update_fields=update_fields)])
+
+
+@receiver(post_delete, sender=Lead)
+def update_lead_rollup_on_delete(sender, instance, **kwargs):
+    apply_rollup_changes(removed=[lead_values(instance, loaded=True)])
+
+
+@receiver(post_save, sender=Lead)
+def update_property_counters_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Keep Property.lead_count/visit_count/conversion_count in step when a
+    lead is created, changes status or moves to another property.
+    """
+    if raw:
+        return
+    saved = lead_values(instance, update_fields=update_fields)
+    new = (saved['property_id'], saved['status'])
+    old = None if created else (instance.get_loaded_value('property_id'), instance.get_loaded_value('status'))
+    if old != new:
+        apply_property_counter_changes([old] if old else [], [new])
+
+
+@receiver(post_delete, sender=Lead)
+def update_property_counters_on_delete(sender, instance, **kwargs):
+    apply_property_counter_changes(
+        removed=[(instance.get_loaded_value('property_id'), instance.get_loaded_value('status'))]
+    )
@@ -0,0 +1,44 @@
+# apps/leads/tags.py
+"""
+Tag filtering (?tags=) and tag counts for leads, on the jsonb Lead.tags
+array. Both are served by the GIN jsonb_path_ops index on the column.
+"""
+from django.db import connection
+from rest_framework import filters
+
+
+def parse_tags(value):
+    return [tag.strip() for tag in value.split(',') if tag.strip()]
+
+
+class LeadTagFilter(filters.BaseFilterBackend):
+    """
+    ?tags=hot,nri keeps the leads tagged with every one of the tags, as a
+    containment query (tags @> '["hot", "nri"]') that the GIN index answers.
+    """
+    tags_param = 'tags'
+
+    def filter_queryset(self, request, queryset, view):
+        tags = parse_tags(request.query_params.get(self.tags_param, ''))
+        if not tags:
+            return queryset
+        return queryset.filter(tags__contains=tags)
+
+
+def tag_counts(queryset):
+    """
+    [{'tag': ..., 'count': ...}] over the leads of `queryset`, most used
+    tags first, from one GROUP BY over the unnested tag arrays.
+    """
+    leads_sql, params = queryset.order_by().values('tags').query.sql_with_params()
+    quote = connection.ops.quote_name
+    tags = f'leads.{quote("tags")}'
+    sql = (
+        f'SELECT tag, COUNT(*) AS count FROM ({leads_sql}) leads '
+        # Rows whose tags are null or not an array have no tags
+        f"CROSS JOIN LATERAL jsonb_array_elements_text(CASE WHEN jsonb_typeof({tags}) = 'array' THEN {tags} ELSE '[]'::jsonb END) tag "
+        f'GROUP BY tag ORDER BY count DESC, tag'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [{'tag': tag, 'count': count} for tag, count in cursor.fetchall()]
@@ -1,6 +1,4 @@
-from django.core.mail import send_mail
-from django.conf import settings
-from django.template.loader import render_to_string
+from apps.core.email import queue_email
 
 def send_lead_assignment_email(lead, agent):
     """
@@ -20,9 +18,6 @@ def send_lead_assignment_email(lead, agent):
         'company': lead.company or 'Not specified',
     }
     
-    # Render the HTML message using a template
-    html_message = render_to_string('leads/email/lead_assignment.html', context)
-    
     # Plain text version
     plain_message = f"""
 Hi {context['agent_name']},
@@ -43,12 +38,93 @@ Best regards,
 CRM Team
     """.strip()
     
-    # Send the email
-    send_mail(
+    # Queue the email; it is delivered by the send_queued_emails worker
+    queue_email(
+        subject=subject,
+        body=plain_message,
+        recipient_list=[agent.email],
+        html_template='leads/email/lead_assignment.html',
+        context=context,
+    )
+
+
+def send_lead_import_summary_email(agent, created_count, skipped_count=0, file_name=None):
+    """
+    Send a single summary email to the agent who received the leads of an import,
+    instead of one assignment email per imported lead.
+    """
+    subject = f'{created_count} New Leads Assigned'
+
+    context = {
+        'agent_name': f"{agent.first_name or agent.username}",
+        'created_count': created_count,
+        'skipped_count': skipped_count,
+        'file_name': file_name,
+    }
+
+    plain_message = f"""
+Hi {context['agent_name']},
+
+A lead import has finished and the new leads have been assigned to you:
+
+Leads assigned: {created_count}
+Rows skipped: {skipped_count}
+
+Please review your lead list and follow up as soon as possible.
+
+Best regards,
+CRM Team
+    """.strip()
+
+    # Queue the email; it is delivered by the send_queued_emails worker
+    queue_email(
+        subject=subject,
+        body=plain_message,
+        recipient_list=[agent.email],
+        html_template='leads/email/lead_import_summary.html',
+        context=context,
+    )
+
+
+# Lead names listed in a bulk assignment digest; the rest are counted
+DIGEST_LEAD_NAMES = 20
+
+
+def send_lead_bulk_assignment_email(agent, lead_names):
+    """
+    Send one email to an agent who was assigned several leads at once by a
+    bulk update, instead of one assignment email per lead.
+    """
+    subject = f'{len(lead_names)} Leads Assigned to You'
+
+    context = {
+        'agent_name': f"{agent.first_name or agent.username}",
+        'lead_count': len(lead_names),
+        'lead_names': lead_names[:DIGEST_LEAD_NAMES],
+        'more_count': max(len(lead_names) - DIGEST_LEAD_NAMES, 0),
+    }
+
+    listed = '\n'.join(f'- {name}' for name in context['lead_names'])
+    if context['more_count']:
+        listed += f"\n...and {context['more_count']} more"
+    plain_message = f"""
+Hi {context['agent_name']},
+
+{len(lead_names)} leads have been assigned to you:
+
+{listed}
+
+Please review your lead list and follow up as soon as possible.
+
+Best regards,
+CRM Team
+    """.strip()
+
+    # Queue the email; it is delivered by the send_queued_emails worker
+    queue_email(
         subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
+        body=plain_message,
         recipient_list=[agent.email],
-        html_message=html_message,
-        fail_silently=False,
+        html_template='leads/email/lead_bulk_assignment.html',
+        context=context,
     )
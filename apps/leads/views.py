@@ -2,321 +2,275 @@
 
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Lead
-from .serializers import LeadSerializer
+from .models import Lead, LeadImportJob
+from .serializers import LeadSerializer, LeadImportJobSerializer
 from .permissions import IsOwnerOrAssignedOrAdmin, IsAdminOrManagerUser
 from .pagination import StandardResultsSetPagination
+from apps.core.cache import CachedListMixin
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.pagination import CursorPaginationMixin
+from .cache import DASHBOARD_STATS_CACHE, FACETS_CACHE, REVENUE_CACHE, TEAM_PERFORMANCE_CACHE, revenue_cache_key
+from .exports import stream_leads_csv
+from .analytics import REVENUE_TIME_RANGES, TEAM_PERFORMANCE_WINDOWS, revenue_series, team_stats
+from .search import LeadContactFilter, LeadSearchFilter
+from .tags import LeadTagFilter, tag_counts
+from .facets import FACET_COLUMNS, facet_counts
+from .rollup import rollup_enabled, rollup_queryset
+from .bulk import BULK_UPDATE_FIELDS, BULK_UPDATE_LIMIT, LeadBulkUpdateError, bulk_update_leads
+from .importers import IMPORT_CHUNK_SIZE, IMPORT_MODES, SUPPORTED_EXTENSIONS, LeadImportError, import_lead_file
+from .utils import send_lead_import_summary_email
 from django.utils import timezone
 from datetime import timedelta
 from rest_framework.parsers import MultiPartParser
 import pandas as pd
-from io import StringIO
-from django.http import HttpResponse
-from dateutil.relativedelta import relativedelta
-from django.db.models import Count, Sum, F, Case, When, FloatField, IntegerField, Q, Value, Func, functions
-from django.db.models.functions import Coalesce, Cast, TruncMonth, TruncDate, TruncDay, Greatest
-from decimal import Decimal 
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.db.models import Count, Sum, F, Case, When, FloatField, Q, Value
+from django.db.models.functions import Coalesce, Cast, TruncDate
 from django.contrib.auth import get_user_model
 from apps.property.models import Property
 
 User = get_user_model()
 
-class NullIfEmpty(Func):
-    function = 'NULLIF'
-    template = "%(function)s(%(expressions)s, '')"
+# ?ordering= keys of builder_performance and the Property columns they sort on
+BUILDER_PERFORMANCE_ORDERING = {
+    'title': 'title',
+    'leads': 'lead_count',
+    'visits': 'visit_count',
+    'conversions': 'conversion_count',
+    'rate': 'rate',
+}
 
-class LeadViewSet(viewsets.ModelViewSet):
+class LeadViewSet(CursorPaginationMixin, ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     serializer_class = LeadSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrAssignedOrAdmin]
+    # Leads embed their assigned and creating users, and a deleted property
+    # or user nulls leads' foreign keys without lead signals
+    etag_related_models = (User, Property)
+    cache_models = (Lead, User, Property)
+    # ?pagination=cursor switches the list to keyset pages on (created_at, id),
+    # which cannot follow ?ordering= or the ranking of the searches
     pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    cursor_conflicting_params = (
+        filters.OrderingFilter.ordering_param, LeadSearchFilter.search_param, LeadContactFilter.contact_param,
+    )
+    # The search backends rank their results, so they run after OrderingFilter
+    filter_backends = [DjangoFilterBackend, LeadTagFilter, filters.OrderingFilter, LeadSearchFilter, LeadContactFilter]
     filterset_fields = ['status', 'source', 'priority', 'assigned_to', 'created_by']
-    search_fields = ['name', 'email', 'phone', 'company', 'interest']
     ordering_fields = ['created_at', 'updated_at', 'name', 'status', 'priority']
     ordering = ['-created_at']
 
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser or getattr(user, 'role', None) in ['admin', 'manager']:
-            return Lead.objects.all().select_related('assigned_to', 'created_by')
+            queryset = Lead.objects.all().select_related('assigned_to', 'created_by')
         else:
-            return Lead.objects.filter(assigned_to=user).select_related('assigned_to', 'created_by')
+            queryset = Lead.objects.filter(assigned_to_id=user.pk).select_related('assigned_to', 'created_by')
+        if self.action in ['list', 'retrieve']:
+            # Only the columns of the serialized fields (see get_fieldset)
+            queryset = self.get_serializer().restrict_queryset(queryset)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in ['list', 'retrieve']:
+            kwargs.update(self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+    def get_fieldset(self):
+        """
+        LeadSerializer arguments for reads:
+        ?fields=id,name,status limits the keys of each lead (?fields=all gives
+        every field), ?expand=assigned_to,created_by adds the full users.
+        Lists default to the compact representation.
+        """
+        if hasattr(self, '_fieldset'):
+            return self._fieldset
+
+        params = self.request.query_params
+        fieldset = {'compact': self.action == 'list'}
+        fields = params.get('fields', '').strip()
+        if fields == 'all':
+            fieldset = {}
+        elif fields:
+            fieldset['fields'] = [name.strip() for name in fields.split(',') if name.strip()]
+            unknown = sorted(set(fieldset['fields']) - set(LeadSerializer().fields))
+            if unknown:
+                raise ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}"})
+        expand = [name.strip() for name in params.get('expand', '').split(',') if name.strip()]
+        if expand:
+            unknown = sorted(set(expand) - set(LeadSerializer.EXPANDABLE_FIELDS))
+            if unknown:
+                raise ValidationError({'expand': f"Unknown relations: {', '.join(unknown)}"})
+            fieldset['expand'] = expand
+        self._fieldset = fieldset
+        return fieldset
 
     def get_permissions(self):
-        if self.action in ['import_leads', 'export_leads', 'dashboard_stats', 'revenue_overview']:
+        if self.action in ['import_leads', 'import_job', 'export_leads', 'dashboard_stats', 'revenue_overview']:
             return [permissions.IsAuthenticated(), IsAdminOrManagerUser()]
         return [permission() for permission in self.permission_classes]
 
     @action(detail=False, methods=['get'])
     def team_performance(self, request):
         """
-        Get team performance metrics including:
+        Get team performance metrics per agent:
         - Number of leads handled
         - Conversion rate
         - Total revenue from converted leads
-        - Performance trend
+        ?window=week|month|quarter|year|all (default all) limits the leads counted.
+        The result is cached per window until the next lead write (or the TTL).
         """
-        try:
-            # Get the last 30 days of data
-            thirty_days_ago = timezone.now() - timedelta(days=30)
-            
-            # Check if we have any users with role='agent'
-            agent_count = User.objects.filter(role__iexact='agent').count()
-            print(f"Found {agent_count} users with role='agent'")
-            
-            # Get all available roles for debugging
-            available_roles = User.objects.values_list('role', flat=True).distinct()
-            print(f"Available roles in the database: {list(available_roles)}")
-
-            # Check if the assigned_leads relationship exists
-            user_model_fields = [f.name for f in User._meta.get_fields()]
-            if 'assigned_leads' not in user_model_fields:
-                print("Error: 'assigned_leads' relationship not found in User model")
-                return Response(
-                    {'error': 'User model is missing assigned_leads relationship'},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            # Get agents and their performance metrics with safe aggregations
-            team_stats = User.objects.filter(
-                role__iexact='agent'  # Case-insensitive match
-            ).annotate(
-                total_leads=Coalesce(Count('assigned_leads'), 0),
-                converted_leads=Coalesce(Count('assigned_leads', filter=Q(assigned_leads__status='Converted')), 0),
-                conversion_rate=Case(
-                    When(total_leads=0, then=Value(0.0)),
-                    default=Cast(
-                        Cast(F('converted_leads'), FloatField()) * 100.0 / 
-                        Cast(F('total_leads'), FloatField()),
-                        output_field=FloatField()
-                    ),
-                ),
-                
-                # Handle budget field with robust validation
-                clean_budget=Case(
-                    When(
-                        Q(assigned_leads__budget='') | 
-                        Q(assigned_leads__budget__isnull=True),
-                        then=Value(0.0)
-                    ),
-                    When(
-                        Q(assigned_leads__budget__regex=r'^[^0-9.-]'),  # Non-numeric values
-                        then=Value(0.0)
-                    ),
-                    default=Case(
-                        When(
-                            Q(assigned_leads__budget__regex=r'^-?\d*\.?\d*$'),  # Valid number
-                            then=functions.Greatest(
-                                Cast(F('assigned_leads__budget'), output_field=FloatField()),
-                                Value(0.0)
-                            )
-                        ),
-                        default=Value(0.0),
-                        output_field=FloatField(),
-                    ),
-                    output_field=FloatField(),
-                ),
-                
-                # Calculate revenue only from converted leads with improved validation
-                revenue=Coalesce(
-                    Sum(
-                        Case(
-                            When(
-                                Q(assigned_leads__status='Converted') &
-                                ~Q(assigned_leads__budget='') &
-                                ~Q(assigned_leads__budget__isnull=True) &
-                                Q(assigned_leads__budget__regex=r'^-?\d*\.?\d*$'),  # Valid number format
-                                then=functions.Greatest(
-                                    Cast('clean_budget', output_field=FloatField()),
-                                    Value(0.0)
-                                )
-                            ),
-                            default=Value(0.0),
-                            output_field=FloatField(),
-                        )
-                    ),
-                    Value(0.0),
-                    output_field=FloatField()
-                ),
-            ).values(
-                'id', 
-                'first_name', 
-                'last_name', 
-                'username',
-                'profile_image',
-                'total_leads',
-                'converted_leads',
-                'conversion_rate',
-                'revenue'
+        window = request.query_params.get('window', 'all')
+        if window not in TEAM_PERFORMANCE_WINDOWS:
+            return Response(
+                {'error': f"Invalid window. Choose one of: {', '.join(TEAM_PERFORMANCE_WINDOWS)}."},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            # Print the raw query for debugging
-            print(f"Generated query: {str(team_stats.query)}")
-            print(f"Found {len(team_stats)} agents with stats")
+        cache_key = TEAM_PERFORMANCE_CACHE.key(request)
+        formatted_stats = TEAM_PERFORMANCE_CACHE.get(cache_key)
+        if formatted_stats is not None:
+            return Response(formatted_stats)
+
+        try:
+            # Windows start at midnight so the rollup and the lead table agree
+            period = TEAM_PERFORMANCE_WINDOWS[window]
+            since = None
+            if period:
+                since = (timezone.localtime() - period).replace(hour=0, minute=0, second=0, microsecond=0)
 
-            # Format the data with additional error handling
             formatted_stats = []
-            for stat in team_stats:
-                try:
-                    name = f"{stat.get('first_name') or ''} {stat.get('last_name') or ''}".strip() or stat.get('username', '')
-                    avatar_url = None
-                    if stat.get('profile_image'):
-                        try:
-                            avatar_url = request.build_absolute_uri(stat['profile_image'])
-                        except Exception as e:
-                            print(f"Error building avatar URL for user {name}: {str(e)}")
-                    
-                    formatted_stats.append({
-                        'agent': name,
-                        'avatar': avatar_url,
-                        'deals': stat.get('converted_leads', 0),
-                        'conversion_rate': round(float(stat.get('conversion_rate', 0) or 0), 1),
-                        'revenue': int(round(float(stat.get('revenue', 0) or 0))),
-                        'total_leads': stat.get('total_leads', 0)
-                    })
-                except Exception as e:
-                    print(f"Error formatting stats for user: {str(e)}")
-                    continue
+            for stat in team_stats(since):
+                name = f"{stat['first_name'] or ''} {stat['last_name'] or ''}".strip() or stat['username']
+                formatted_stats.append({
+                    'agent': name,
+                    'avatar': request.build_absolute_uri(stat['profile_image']) if stat['profile_image'] else None,
+                    'deals': stat['converted_leads'],
+                    'conversion_rate': round(float(stat['conversion_rate']), 1),
+                    'revenue': int(round(float(stat['revenue']))),
+                    'total_leads': stat['total_leads']
+                })
 
             # Sort by revenue descending
             formatted_stats.sort(key=lambda x: x['revenue'], reverse=True)
-            
-            print(f"Returning {len(formatted_stats)} formatted agent stats")
-            return Response(formatted_stats)
-            
         except Exception as e:
-            import traceback
             print(f"Error in team_performance endpoint: {str(e)}")
-            print(traceback.format_exc())
             return Response(
                 {'error': 'An error occurred while fetching team performance data'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+        TEAM_PERFORMANCE_CACHE.set(cache_key, formatted_stats)
+        return Response(formatted_stats)
     
     @action(detail=False, methods=['get'])
     def revenue_overview(self, request):
         """
         Calculates total revenue and sales commission from converted leads, grouped by period.
-        - Supports daily or monthly grouping based on time range
-        - Handles missing periods with zero values
+        - Daily periods for this_month and 3_months, monthly ones for 6_months and year (the default)
+        - Every period of the range is listed, with zero values when nothing converted
         - Sales commission is calculated as 60% of revenue
-        - Improved budget validation and handling
+        - Cached per time range until the next change to a converted lead
         """
-        try:
-            time_range = request.query_params.get('time_range', 'year')
-            now = timezone.now()
-            start_date = now
-            group_by_day = False
-            date_format = '%b %Y'  # Default monthly format
-
-            # Determine time range and grouping
-            if time_range == 'this_month':
-                start_date = now.replace(day=1, hour=0, minute=0, second=0)
-                group_by_day = True
-                date_format = '%b %d'
-            elif time_range == '3_months':
-                start_date = now - relativedelta(months=3)
-                group_by_day = True
-                date_format = '%b %d'
-            elif time_range == '6_months':
-                start_date = now - relativedelta(months=6)
-            else:  # Default to 1 year
-                start_date = now - relativedelta(years=1)
-
-            # Query converted leads with improved budget validation
-            queryset = Lead.objects.filter(
-                status='Converted',
-                updated_at__gte=start_date
-            )
+        time_range = request.query_params.get('time_range', 'year')
+        if time_range not in REVENUE_TIME_RANGES:
+            time_range = 'year'
 
-            # Use TruncDay or TruncMonth based on grouping type
-            trunc_period = TruncDay('updated_at') if group_by_day else TruncMonth('updated_at')
-
-            # Calculate revenue with robust budget handling
-            revenue_by_period = queryset.annotate(
-                period=trunc_period,
-                clean_budget=Case(
-                    When(
-                        Q(budget='') | Q(budget__isnull=True),
-                        then=Value(0.0)
-                    ),
-                    When(
-                        Q(budget__regex=r'^[^0-9.-]'),  # Non-numeric values
-                        then=Value(0.0)
-                    ),
-                    default=Case(
-                        When(
-                            Q(budget__regex=r'^-?\d*\.?\d*$'),  # Valid number
-                            then=functions.Greatest(
-                                Cast('budget', output_field=FloatField()),
-                                Value(0.0)
-                            )
-                        ),
-                        default=Value(0.0),
-                        output_field=FloatField(),
-                    ),
-                    output_field=FloatField(),
-                )
-            ).values('period').annotate(
-                total_revenue=Sum('clean_budget')
-            ).values('period', 'total_revenue').order_by('period')
-
-            # Generate all periods in range for consistent data points
-            all_periods = []
-            current = start_date
-            end_date = now.replace(hour=23, minute=59, second=59)  # Include full current day
-
-            while current <= end_date:
-                period = current.replace(hour=0, minute=0, second=0, microsecond=0)
-                if group_by_day:
-                    all_periods.append(period)
-                    current += timedelta(days=1)
-                else:
-                    all_periods.append(period.replace(day=1))  # First day of month for monthly grouping
-                    current += relativedelta(months=1)
-                    current = current.replace(day=1)
-
-            # Create lookup table for existing data
-            existing_data = {
-                item['period'].replace(hour=0, minute=0, second=0, microsecond=0): item['total_revenue'] or 0.0
-                for item in revenue_by_period
-            }
+        cache_key = revenue_cache_key(request, time_range)
+        formatted_data = REVENUE_CACHE.get(cache_key)
+        if formatted_data is not None:
+            return Response(formatted_data)
+
+        try:
+            group_by_day = REVENUE_TIME_RANGES[time_range][1]
+            date_format = '%b %d' if group_by_day else '%b %Y'
 
-            # Format response with all periods and calculated values
             formatted_data = []
-            for period in all_periods:
-                revenue = float(existing_data.get(period, 0.0))
+            for period, revenue in revenue_series(time_range):
+                revenue = float(revenue)
                 sales_commission = round(revenue * 0.6, 2)  # 60% commission rate
-                
+
                 formatted_data.append({
                     "name": period.strftime(date_format),
                     "revenue": round(revenue, 2),
                     "sales": sales_commission
                 })
-
-            return Response(formatted_data)
-            
         except Exception as e:
             print(f"Error in revenue_overview endpoint: {str(e)}")
             return Response(
                 {'error': 'An error occurred while processing revenue data'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-        
+
+        REVENUE_CACHE.set(cache_key, formatted_data)
+        return Response(formatted_data)
+
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
-        # ... (The rest of your code remains the same)
+        """
+        Lead counts for the dashboard. All scalar metrics come from a single
+        aggregate() with filtered counts, and the response is cached per user
+        scope and query parameters until the next lead write (or the TTL).
+        """
+        cache_key = DASHBOARD_STATS_CACHE.key(request)
+        data = DASHBOARD_STATS_CACHE.get(cache_key)
+        if data is None:
+            data = self._dashboard_stats(request)
+            DASHBOARD_STATS_CACHE.set(cache_key, data)
+        return Response(data)
+
+    def _dashboard_stats(self, request):
         queryset = self.filter_queryset(self.get_queryset())
         now = timezone.now()
         
         current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         previous_month_end = current_month_start - timedelta(days=1)
         previous_month_start = previous_month_end.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        current_month_queryset = queryset.filter(created_at__gte=current_month_start)
-        previous_month_queryset = queryset.filter(created_at__gte=previous_month_start, created_at__lt=current_month_start)
+
+        # Counts come either from the daily rollup (cost depends on the number
+        # of days) or, when it is disabled or cannot answer the filters, from
+        # the lead table itself.
+        rollup = rollup_queryset(request) if rollup_enabled() else None
+        if rollup is not None:
+            counted = rollup
+            tally = lambda condition=None: Coalesce(Sum('lead_count', filter=condition), 0)
+            created_on = F('day')
+            current_month = Q(day__gte=current_month_start.date())
+            previous_month = Q(day__gte=previous_month_start.date(), day__lt=current_month_start.date())
+        else:
+            counted = queryset.order_by()
+            tally = lambda condition=None: Count('id', filter=condition)
+            created_on = TruncDate('created_at')
+            current_month = Q(created_at__gte=current_month_start)
+            previous_month = Q(created_at__gte=previous_month_start, created_at__lt=current_month_start)
+        converted = Q(status='Converted')
+        new = Q(status='New')
+        qualified = Q(status='Qualified')
+
+        totals = counted.aggregate(
+            total_leads=tally(),
+            converted_leads=tally(converted),
+            new_leads=tally(new),
+            qualified_leads=tally(qualified),
+            current_month_total_leads=tally(current_month),
+            current_month_converted_leads=tally(current_month & converted),
+            current_month_new_leads=tally(current_month & new),
+            current_month_qualified_leads=tally(current_month & qualified),
+            previous_month_total_leads=tally(previous_month),
+            previous_month_converted_leads=tally(previous_month & converted),
+            previous_month_new_leads=tally(previous_month & new),
+            previous_month_qualified_leads=tally(previous_month & qualified),
+        )
+
+        # Both distributions come from one GROUP BY over (status, source)
+        status_counts = {}
+        source_counts = {}
+        for row in counted.values('status', 'source').annotate(count=tally()):
+            status_counts[row['status']] = status_counts.get(row['status'], 0) + row['count']
+            source_counts[row['source']] = source_counts.get(row['source'], 0) + row['count']
 
         time_range = request.query_params.get('time_range', 'week')
         today = now.date()
@@ -327,165 +281,205 @@ class LeadViewSet(viewsets.ModelViewSet):
         else:
             start_date = today - timedelta(days=6)
 
-        daily_leads_data = queryset.filter(created_at__date__gte=start_date)\
-                                   .annotate(date=TruncDate('created_at'))\
-                                   .values('date')\
-                                   .annotate(count=Count('id'))\
-                                   .order_by('date')
+        daily_leads_data = counted.annotate(date=created_on)\
+                                  .filter(date__gte=start_date)\
+                                  .values('date')\
+                                  .annotate(count=tally())\
+                                  .order_by('date')
         
         counts_by_date = {item['date'].strftime('%Y-%m-%d'): item['count'] for item in daily_leads_data}
         all_dates_in_range = [start_date + timedelta(days=i) for i in range((today - start_date).days + 1)]
         formatted_daily_leads = [{'date': dt.strftime('%Y-%m-%d'), 'count': counts_by_date.get(dt.strftime('%Y-%m-%d'), 0)} for dt in all_dates_in_range]
 
-        overall_total_leads = queryset.count()
-        overall_converted_leads = queryset.filter(status='Converted').count()
+        overall_total_leads = totals['total_leads']
+        overall_converted_leads = totals['converted_leads']
 
-        return Response({
-            'total_leads': overall_total_leads,
-            'converted_leads': overall_converted_leads,
-            'new_leads': queryset.filter(status='New').count(), 
-            'qualified_leads': queryset.filter(status='Qualified').count(), 
+        return {
+            **totals,
             'conversion_rate': round((overall_converted_leads / overall_total_leads * 100) if overall_total_leads > 0 else 0, 1),
-            'current_month_total_leads': current_month_queryset.count(),
-            'current_month_converted_leads': current_month_queryset.filter(status='Converted').count(),
-            'current_month_new_leads': current_month_queryset.filter(status='New').count(),
-            'current_month_qualified_leads': current_month_queryset.filter(status='Qualified').count(),
-            'previous_month_total_leads': previous_month_queryset.count(),
-            'previous_month_converted_leads': previous_month_queryset.filter(status='Converted').count(),
-            'previous_month_new_leads': previous_month_queryset.filter(status='New').count(),
-            'previous_month_qualified_leads': previous_month_queryset.filter(status='Qualified').count(),
-            'status_distribution': list(queryset.values('status').annotate(count=Count('status')).order_by('status')),
-            'source_distribution': list(queryset.values('source').annotate(count=Count('source')).order_by('source')),
+            'status_distribution': [{'status': key, 'count': status_counts[key]} for key in sorted(status_counts)],
+            'source_distribution': [{'source': key, 'count': source_counts[key]} for key in sorted(source_counts)],
             'recent_leads': LeadSerializer(queryset.order_by('-created_at')[:5], many=True, context={'request': request}).data,
             'daily_leads_added': formatted_daily_leads,
-        })
+        }
         
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Lead counts per status, source, priority and assignee for the list
+        sidebar, taking the same filter and search parameters as the list.
+        Each facet's counts ignore that facet's own filter. The response is
+        cached per user scope and parameters until the next lead write.
+        """
+        cache_key = FACETS_CACHE.key(request)
+        data = FACETS_CACHE.get(cache_key)
+        if data is None:
+            data = self._facets(request)
+            FACETS_CACHE.set(cache_key, data)
+        return Response(data)
+
+    def _facets(self, request):
+        queryset = self.get_queryset()
+        for backend in self.filter_backends:
+            if backend not in (DjangoFilterBackend, filters.OrderingFilter):
+                queryset = backend().filter_queryset(request, queryset, self)
+
+        # The facet filters are validated here but applied by facet_counts
+        filterset_class = DjangoFilterBackend().get_filterset_class(self, queryset)
+        filterset = filterset_class(data=request.query_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        selected = {
+            facet: getattr(value, 'pk', value)
+            for facet, value in filterset.form.cleaned_data.items()
+            if facet in FACET_COLUMNS and value not in (None, '')
+        }
+        params = request.query_params.copy()
+        for facet in FACET_COLUMNS:
+            params.pop(facet, None)
+        queryset = filterset_class(data=params, queryset=queryset, request=request).qs
+        return facet_counts(queryset, selected)
+
+    @action(detail=False, methods=['get'])
+    def tag_facets(self, request):
+        """
+        Number of leads per tag among the leads the user can see, narrowed by
+        the usual list filters (?status=, ?tags=, ?search=, ...).
+        """
+        return Response(tag_counts(self.filter_queryset(self.get_queryset())))
+
+    @action(detail=False, methods=['post'])
+    def bulk_update(self, request):
+        """
+        Applies one patch to many leads with a single UPDATE:
+        {"ids": [1, 2, 3], "patch": {"assigned_to": 5, "status": "Contacted"}}.
+        Without "ids", the leads matching the list filters in the query string
+        (?status=, ?assigned_to=, ?search=, ...) are updated. Only leads the
+        user can see are changed; each newly assigned agent gets one digest
+        email. Patchable fields: status, priority, source, assigned_to, property.
+        """
+        patch = request.data.get('patch')
+        if not isinstance(patch, dict) or not patch:
+            return Response({'error': 'A non-empty "patch" object is required'}, status=status.HTTP_400_BAD_REQUEST)
+        unknown = sorted(set(patch) - set(BULK_UPDATE_FIELDS))
+        if unknown:
+            return Response(
+                {'error': f"These fields cannot be bulk updated: {', '.join(unknown)}. Allowed: {', '.join(BULK_UPDATE_FIELDS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = LeadSerializer(data=patch, partial=True, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ids = request.data.get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids):
+                return Response({'error': '"ids" must be a list of lead ids'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > BULK_UPDATE_LIMIT:
+                return Response(
+                    {'error': f'A bulk update can change at most {BULK_UPDATE_LIMIT} leads.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(pk__in=ids)
+        else:
+            filter_params = set(self.filterset_fields) | {
+                filters.SearchFilter.search_param, LeadContactFilter.contact_param, LeadTagFilter.tags_param,
+            }
+            if not filter_params & set(request.query_params):
+                return Response(
+                    {'error': 'Provide "ids" or at least one filter in the query string'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        try:
+            updated_ids = bulk_update_leads(queryset, serializer.validated_data)
+        except LeadBulkUpdateError as e:
+            return Response({'error': str(e)}, status=e.status_code)
+
+        response = {'updated_count': len(updated_ids)}
+        if ids is not None:
+            # Ids that do not exist or that the user cannot see
+            response['not_updated_ids'] = sorted(set(ids) - set(updated_ids))
+        return Response(response)
+
     @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
     def import_leads(self, request):
+        """
+        Imports leads from a CSV/XLSX/XLS file.
+        ?mode=create|skip|upsert (default create) decides what happens to rows
+        whose phone or email matches an existing lead: they are created anyway,
+        skipped, or used to update the existing lead.
+        With ?background=true the file is stored and queued for the
+        `process_lead_imports` worker, and the job is returned at once (202).
+        Its progress can be polled at /api/leads/import-jobs/<id>/.
+        """
         if 'file' not in request.FILES:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
         file = request.FILES['file']
-        file_name_lower = file.name.lower()
 
-        if not file_name_lower.endswith(('.csv', '.xlsx', '.xls')):
+        if not file.name.lower().endswith(SUPPORTED_EXTENSIONS):
             return Response(
                 {'error': 'Unsupported file format. Please use CSV, XLSX, or XLS.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        try:
-            if file_name_lower.endswith('.csv'):
-                try:
-                    # For CSV, ensure it's read as a string initially to avoid type issues
-                    df = pd.read_csv(file, dtype=str, keep_default_na=False, na_filter=False)
-                except UnicodeDecodeError:
-                    file.seek(0)
-                    df = pd.read_csv(file, encoding='latin1', dtype=str, keep_default_na=False, na_filter=False)
-            elif file_name_lower.endswith('.xlsx'):
-                try:
-                    # Explicitly use openpyxl for .xlsx
-                    # Ensure all data is read as string to prevent pandas from inferring types like int/float for phone numbers etc.
-                    df = pd.read_excel(file, engine='openpyxl', dtype=str, keep_default_na=False, na_filter=False)
-                except ImportError:
-                    return Response(
-                        {'error': "Processing .xlsx files requires the 'openpyxl' library. Please install it (`pip install openpyxl`) and try again."},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR # Or 400 if you consider it a client-side setup issue
-                    )
-                except Exception as e: # Catch other potential errors from read_excel
-                    return Response(
-                        {'error': f"Error reading XLSX file: {str(e)}"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            elif file_name_lower.endswith('.xls'):
-                try:
-                    # Explicitly use xlrd for .xls
-                    df = pd.read_excel(file, engine='xlrd', dtype=str, keep_default_na=False, na_filter=False)
-                except ImportError:
-                    return Response(
-                        {'error': "Processing .xls files requires the 'xlrd' library. Please install it (`pip install xlrd`) and try again."},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR # Or 400
-                    )
-                except Exception as e: # Catch other potential errors from read_excel
-                     return Response(
-                        {'error': f"Error reading XLS file: {str(e)}"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            else: # Should not be reached due to earlier check, but as a safeguard
-                return Response(
-                    {'error': 'Internal error: Unsupported file format processing.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
 
-            df.columns = [str(col).strip().lower() for col in df.columns] # Ensure column names are strings before stripping
-            
-            created_count = 0
-            skipped_rows_details = []
-
-            expected_columns = [
-                'name', 'email', 'phone', 'status', 'source', 'interest', 
-                'priority', 'company', 'position', 'budget', 'timeline', 
-                'requirements', 'notes', 'tags'
-            ]
+        mode = request.query_params.get('mode', 'create')
+        if mode not in IMPORT_MODES:
+            return Response(
+                {'error': f"Invalid import mode. Choose one of: {', '.join(IMPORT_MODES)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.query_params.get('background', '').lower() in ('1', 'true', 'yes'):
+            job = LeadImportJob.objects.create(
+                file=file,
+                file_name=file.name,
+                mode=mode,
+                created_by_id=request.user.pk,
+                chunk_size=IMPORT_CHUNK_SIZE,
+            )
+            return Response(LeadImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
             
-            # Basic check if essential columns are present (optional, but good for robustness)
-            # For a more robust solution, you'd check if ALL required columns are present.
-            if 'name' not in df.columns or 'email' not in df.columns or 'phone' not in df.columns:
-                 return Response(
-                    {'error': 'Missing essential columns in the file. Required columns include at least: name, email, phone.'},
-                    status=status.HTTP_400_BAD_REQUEST
+        try:
+            # The file is read, validated and inserted chunk by chunk, so memory
+            # use depends on the chunk size rather than on the size of the file.
+            try:
+                created_count, updated_count, duplicate_count, skipped_rows_details = import_lead_file(
+                    file, file.name, request.user, mode=mode
                 )
+            except LeadImportError as e:
+                return Response({'error': str(e)}, status=e.status_code)
 
-
-            for index, row in df.iterrows():
-                lead_data = {
-                    'name': row.get('name', '').strip(),
-                    'email': row.get('email', '').strip(),
-                    'phone': str(row.get('phone', '')).strip(), # Ensure phone is treated as string
-                    'status': row.get('status', 'New').strip(),
-                    'source': row.get('source', 'Website').strip(),
-                    'interest': row.get('interest', '').strip(),
-                    'priority': row.get('priority', 'Medium').strip(),
-                    'company': row.get('company', '').strip(),
-                    'position': row.get('position', '').strip(),
-                    'budget': str(row.get('budget', '')).strip(), # Ensure budget is string
-                    'timeline': row.get('timeline', '').strip(),
-                    'requirements': row.get('requirements', '').strip(),
-                    'notes': row.get('notes', '').strip(),
-                    # Ensure tags are handled as a list of strings
-                    'tags': [tag.strip() for tag in str(row.get('tags', '')).split(',') if tag.strip()] if pd.notna(row.get('tags')) and str(row.get('tags', '')).strip() else [],
-                }
-                
-                # Validate required fields like name, email, phone
-                if not lead_data['name'] or not lead_data['email'] or not lead_data['phone']:
-                    skipped_rows_details.append({
-                        'row_number': index + 2, # +2 because index is 0-based and header is row 1
-                        'errors': {'Required fields': ['Name, Email, and Phone are mandatory.']}
-                    })
-                    continue
-
-                serializer = LeadSerializer(data=lead_data, context={'request': request})
-                if serializer.is_valid():
-                    # Assign to the importing user by default, or allow override if 'assigned_to_email' or 'assigned_to_id' is in the file
-                    # For simplicity, we'll assign to the current user.
-                    # More complex logic could involve looking up users by email/ID from the file.
-                    serializer.save(assigned_to=request.user) # Explicitly assign to current user
-                    created_count += 1
-                else:
-                    skipped_rows_details.append({'row_number': index + 2, 'errors': serializer.errors})
+            if created_count:
+                try:
+                    send_lead_import_summary_email(request.user, created_count, len(skipped_rows_details), file.name)
+                except Exception as e:
+                    print(f"Error sending lead import summary email to {request.user.email}: {e}")
             
             message = f'{created_count} leads imported successfully.'
             response_status = status.HTTP_201_CREATED
+            if updated_count:
+                message += f' {updated_count} existing leads were updated.'
+            if duplicate_count:
+                message += f' {duplicate_count} duplicate leads were skipped.'
 
             if skipped_rows_details:
                 message += f' {len(skipped_rows_details)} rows were skipped.'
-                if created_count == 0 and skipped_rows_details: # If all rows failed
+                if created_count == 0 and updated_count == 0 and duplicate_count == 0: # If all rows failed
                     response_status = status.HTTP_400_BAD_REQUEST
                 # If some succeeded and some failed, it's still partially successful (207 Multi-Status could be used too)
                 # For simplicity, we'll use 201 if any were created, or 400 if none were and there were skips.
 
             return Response(
-                {'message': message, 'created_count': created_count, 'skipped_count': len(skipped_rows_details), 'skipped_details': skipped_rows_details if skipped_rows_details else None},
+                {
+                    'message': message,
+                    'created_count': created_count,
+                    'updated_count': updated_count,
+                    'duplicate_count': duplicate_count,
+                    'skipped_count': len(skipped_rows_details),
+                    'skipped_details': skipped_rows_details if skipped_rows_details else None
+                },
                 status=response_status
             )
             
@@ -502,99 +496,70 @@ class LeadViewSet(viewsets.ModelViewSet):
             )
 
 
+    @action(detail=False, methods=['get'], url_path=r'import-jobs/(?P<job_id>[0-9]+)')
+    def import_job(self, request, job_id=None):
+        """
+        Progress of a background import job: rows processed, created and
+        skipped so far, and the skipped-row details.
+        """
+        jobs = LeadImportJob.objects.all()
+        if not (request.user.is_superuser or getattr(request.user, 'role', None) == 'admin'):
+            jobs = jobs.filter(created_by_id=request.user.pk)
+        job = get_object_or_404(jobs, pk=job_id)
+        return Response(LeadImportJobSerializer(job).data)
+
     @action(detail=False, methods=['get'])
     def export(self, request):
+        """
+        Streams the filtered leads as CSV. Rows are read straight from the
+        database in chunks and written as they arrive, so time-to-first-byte
+        and memory use do not grow with the number of leads.
+        """
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = LeadSerializer(queryset, many=True, context={'request': request})
-        data_to_export = []
-
-        for lead_data in serializer.data:
-            flat_lead = lead_data.copy()
-            if 'assigned_to_detail' in flat_lead and flat_lead['assigned_to_detail']:
-                flat_lead['assigned_to_name'] = f"{flat_lead['assigned_to_detail'].get('first_name','')} {flat_lead['assigned_to_detail'].get('last_name','')}".strip()
-                flat_lead['assigned_to_email'] = flat_lead['assigned_to_detail'].get('email','')
-            else:
-                flat_lead['assigned_to_name'] = 'Unassigned'
-                flat_lead['assigned_to_email'] = ''
-            if 'assigned_to_detail' in flat_lead: del flat_lead['assigned_to_detail']
-            
-            if 'created_by_detail' in flat_lead and flat_lead['created_by_detail']:
-                 flat_lead['created_by_name'] = f"{flat_lead['created_by_detail'].get('first_name','')} {flat_lead['created_by_detail'].get('last_name','')}".strip()
-                 flat_lead['created_by_email'] = flat_lead['created_by_detail'].get('email','') # Assuming email is available
-            else:
-                flat_lead['created_by_name'] = ''
-                flat_lead['created_by_email'] = ''
-            if 'created_by_detail' in flat_lead: del flat_lead['created_by_detail']
-
-            if isinstance(flat_lead.get('tags'), list):
-                flat_lead['tags'] = ','.join(flat_lead['tags'])
-            
-            # Ensure all fields from the model are present, even if empty, for consistent CSV columns
-            # This list should ideally match your model fields or desired export columns
-            all_model_fields = [f.name for f in Lead._meta.get_fields() if not f.is_relation or f.one_to_one or (f.many_to_one and f.related_model)]
-            # Add custom fields from serializer
-            custom_fields = ['assigned_to_name', 'assigned_to_email', 'created_by_name', 'created_by_email']
-            
-            output_row = {}
-            for field_name in all_model_fields + custom_fields:
-                output_row[field_name] = flat_lead.get(field_name, '')
-            
-            # Remove fields we don't want to export directly if they were part of all_model_fields
-            # e.g., 'assigned_to', 'created_by' (IDs) if you only want names/emails
-            if 'assigned_to' in output_row: del output_row['assigned_to']
-            if 'created_by' in output_row: del output_row['created_by']
-
-
-            data_to_export.append(output_row)
-
-        df = pd.DataFrame(data_to_export)
-        
-        # Define a specific order for columns if desired
-        # ordered_columns = ['id', 'name', 'email', 'phone', 'company', 'position', 'status', 'source', 'interest', 'priority', 
-        #                    'assigned_to_name', 'assigned_to_email', 'budget', 'timeline', 'requirements', 'notes', 'tags',
-        #                    'created_by_name', 'created_by_email', 'created_at', 'updated_at', 'last_activity']
-        # df = df.reindex(columns=ordered_columns, fill_value='') # Use reindex to ensure all columns are present
-
-        response = HttpResponse(content_type='text/csv; charset=utf-8-sig')
+        response = StreamingHttpResponse(stream_leads_csv(queryset), content_type='text/csv; charset=utf-8-sig')
         response['Content-Disposition'] = 'attachment; filename="leads_export.csv"'
-        df.to_csv(response, index=False, encoding='utf-8-sig')
         return response
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsAdminOrManagerUser])
     def builder_performance(self, request):
         """
-        Aggregates performance metrics for each property (builder project).
+        Performance metrics for each property (builder project) with leads,
+        read from the counters stored on Property:
         - Total Leads
         - Total Site Visits (based on Lead status)
         - Total Conversions
         - Conversion Rate
+        Paginated; ?ordering= accepts title, leads, visits, conversions or rate,
+        optionally prefixed with '-' (default -conversions).
         """
+        ordering = request.query_params.get('ordering', '-conversions')
+        field = BUILDER_PERFORMANCE_ORDERING.get(ordering.lstrip('-'))
+        if field is None:
+            return Response(
+                {'error': f"Invalid ordering. Choose one of: {', '.join(BUILDER_PERFORMANCE_ORDERING)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        descending = ordering.startswith('-')
+
         try:
-            # This query annotates each Property with the required counts.
-            # I am assuming the property name field is 'title'. 
-            # Please change 'title' to the correct field name from your Property model.
-            performance_data = Property.objects.annotate(
-                leads=Count('lead'),
-                visits=Count('lead', filter=Q(lead__status__in=['Site Visit Done', 'Site Visit Scheduled'])),
-                conversions=Count('lead', filter=Q(lead__status='Converted'))
+            performance_data = Property.objects.filter(
+                lead_count__gt=0  # Properties without leads are left out
             ).annotate(
                 rate=Case(
-                    When(leads__gt=0, then=Cast(F('conversions'), FloatField()) * 100.0 / Cast(F('leads'), FloatField())),
+                    When(lead_count__gt=0, then=Cast(F('conversion_count'), FloatField()) * 100.0 / Cast(F('lead_count'), FloatField())),
                     default=Value(0.0),
                     output_field=FloatField()
                 )
             ).values(
-                'title', # <-- IMPORTANT: Change 'title' if your property model uses a different field (e.g., 'name')
-                'leads',
-                'visits',
-                'conversions',
-                'rate'
-            ).order_by('-conversions') # Order by most conversions
-
-            # Filter out properties that have no leads
-            active_projects = [p for p in performance_data if p['leads'] > 0]
-
-            return Response(active_projects)
+                'title',
+                'rate',
+                leads=F('lead_count'),
+                visits=F('visit_count'),
+                conversions=F('conversion_count'),
+            ).order_by(f"{'-' if descending else ''}{field}", f"{'-' if descending else ''}id")
+
+            page = self.paginate_queryset(performance_data)
+            return self.get_paginated_response(page)
 
         except Exception as e:
             import traceback
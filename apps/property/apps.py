@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class PropertyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.property'
\ No newline at end of file
+    name = 'apps.property'
+
+    def ready(self):
+        import apps.property.signals  # noqa: F401
\ No newline at end of file
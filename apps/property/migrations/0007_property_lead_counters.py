@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:49
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_lead_counters(apps, schema_editor):
+    Lead = apps.get_model('leads', 'Lead')
+    Property = apps.get_model('property', 'Property')
+    counts = Lead.objects.filter(property__isnull=False).order_by().values('property_id').annotate(
+        lead_count=Count('id'),
+        visit_count=Count('id', filter=Q(status__in=['Site Visit Done', 'Site Visit Scheduled'])),
+        conversion_count=Count('id', filter=Q(status='Converted')),
+    )
+    for row in counts.iterator():
+        property_id = row.pop('property_id')
+        Property.objects.filter(pk=property_id).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0006_alter_property_contact_phone'),
+        ('leads', '0003_lead_property'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='conversion_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='lead_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='visit_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['-conversion_count', '-id'], name='property_conversions_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['-lead_count', '-id'], name='property_leads_idx'),
+        ),
+        migrations.RunPython(fill_lead_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-17 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0007_property_lead_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(fields=['property', '-is_primary', '-created_at'], name='propertyimage_order_idx'),
+        ),
+    ]
@@ -66,10 +66,20 @@ class Property(models.Model):
     progress = models.IntegerField(default=0, help_text="Construction progress in percentage")
     units_total = models.IntegerField(default=0)
     units_available = models.IntegerField(default=0)
+
+    # Lead counters kept current by the lead signals with F() updates (see
+    # apps.leads.counters) and recomputed by `rebuild_property_counters`.
+    lead_count = models.IntegerField(default=0, editable=False)
+    visit_count = models.IntegerField(default=0, editable=False)
+    conversion_count = models.IntegerField(default=0, editable=False)
     
     class Meta:
         verbose_name_plural = "Properties"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-conversion_count', '-id'], name='property_conversions_idx'),
+            models.Index(fields=['-lead_count', '-id'], name='property_leads_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -88,6 +98,10 @@ class PropertyImage(models.Model):
 
     class Meta:
         ordering = ['-is_primary', '-created_at']
+        indexes = [
+            # A property's images in display order (property__images prefetch)
+            models.Index(fields=['property', '-is_primary', '-created_at'], name='propertyimage_order_idx'),
+        ]
 
     def __str__(self):
         return f"Image for {self.property.title} ({self.id})"
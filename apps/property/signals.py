@@ -0,0 +1,20 @@
+# apps/property/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.core.cache import track_versions
+
+from .models import Property, PropertyImage
+
+track_versions(Property, PropertyImage)
+
+
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+def touch_property_on_image_change(sender, instance, **kwargs):
+    """
+    Images are part of the property representation: moving the property's
+    updated_at invalidates its ETag and Last-Modified.
+    """
+    Property.objects.filter(pk=instance.property_id).update(updated_at=timezone.now())
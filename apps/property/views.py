@@ -8,10 +8,23 @@ from django.db import transaction
 from .models import Property, PropertyImage
 from .serializers import PropertySerializer, PropertyImageSerializer
 from django.core.mail import send_mail
+from apps.core.cache import CachedListMixin
+from apps.core.conditional import ConditionalGetMixin
+from apps.leads.models import Lead
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     serializer_class = PropertySerializer
     permission_classes = [IsAuthenticated]
+    # Image changes and the lead counters touch Property.updated_at (see
+    # signals), so the row alone validates the detail. Those writes do not
+    # bump the Property version: the list also depends on images and leads.
+    cache_models = (Property, PropertyImage, Lead)
+
+    def cache_scope(self, user):
+        # get_queryset: every property for staff, their own ones for others
+        if hasattr(user, 'is_admin') and (user.is_admin() or user.is_manager() or user.is_agent()):
+            return 'all'
+        return f'user:{user.pk}'
     
     def get_queryset(self):
         try:
@@ -20,14 +33,14 @@ class PropertyViewSet(viewsets.ModelViewSet):
             if hasattr(user, 'is_admin') and (user.is_admin() or user.is_manager() or user.is_agent()):
                 return Property.objects.all().order_by('-created_at')
             # Return own properties for others
-            return Property.objects.filter(created_by=user).order_by('-created_at')
+            return Property.objects.filter(created_by_id=user.pk).order_by('-created_at')
         except Exception as e:
             print(f"Error in get_queryset: {str(e)}")
             return Property.objects.none()
     
     def perform_create(self, serializer):
         # Set the created_by field to the current user
-        serializer.save(created_by=self.request.user)
+        serializer.save(created_by_id=self.request.user.pk)
     
     @action(detail=True, methods=['post'])
     def set_primary_image(self, request, pk=None):
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0007_property_lead_counters'),
+        ('site_visits', '0003_alter_sitevisit_options_sitevisit_client_name_manual_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sitevisit',
+            index=models.Index(fields=['created_at', 'id'], name='sitevisit_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-17 05:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('property', '0008_propertyimage_order_index'),
+        ('site_visits', '0004_sitevisit_created_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sitevisit',
+            index=models.Index(fields=['date', 'time'], name='sitevisit_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sitevisit',
+            index=models.Index(condition=models.Q(('status__in', ['scheduled', 'confirmed'])), fields=['date', 'time'], name='sitevisit_open_date_idx'),
+        ),
+    ]
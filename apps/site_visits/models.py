@@ -1,10 +1,14 @@
 # site_visits_app/models.py
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from apps.property.models import Property # Adjust import as per your project
+from apps.core.models import FieldTrackerMixin
 
 
-class SiteVisit(models.Model):
+class SiteVisit(FieldTrackerMixin, models.Model):
+    # Original values kept by FieldTrackerMixin for the pre_save signal
+    tracked_fields = ('agent_id',)
+
     property = models.ForeignKey(
         Property,
         on_delete=models.CASCADE,
@@ -46,6 +50,18 @@ class SiteVisit(models.Model):
 
     class Meta:
         ordering = ['-date', '-time']
+        indexes = [
+            # Keyset pagination (apps.core.pagination)
+            models.Index(fields=['created_at', 'id'], name='sitevisit_created_id_idx'),
+            # Visits from a date on (summary_counts)
+            models.Index(fields=['date', 'time'], name='sitevisit_date_time_idx'),
+            # Scheduled and confirmed visits from a date on (upcoming, summary_counts)
+            models.Index(
+                fields=['date', 'time'],
+                name='sitevisit_open_date_idx',
+                condition=models.Q(status__in=['scheduled', 'confirmed']),
+            ),
+        ]
         verbose_name = "Site Visit"
         verbose_name_plural = "Site Visits"
 
@@ -58,4 +74,10 @@ class SiteVisit(models.Model):
         
         property_title_str = self.property.title if self.property else "N/A Property"
         
-        return f"Visit for {property_title_str} with {client_display_name_str} on {self.date}"
\ No newline at end of file
+        return f"Visit for {property_title_str} with {client_display_name_str} on {self.date}"
+
+    def save(self, *args, **kwargs):
+        # The pre_save assignment signal writes to the email outbox; keep that
+        # row in the same transaction as the visit itself.
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
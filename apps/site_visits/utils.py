@@ -1,6 +1,4 @@
-from django.core.mail import send_mail
-from django.conf import settings
-from django.template.loader import render_to_string
+from apps.core.email import queue_email
 
 def send_site_visit_assignment_email(site_visit, agent):
     """
@@ -31,9 +29,6 @@ def send_site_visit_assignment_email(site_visit, agent):
         'property_type': getattr(site_visit.property, 'property_type', 'Type not specified'),
     }
     
-    # Render the HTML message using a template
-    html_message = render_to_string('site_visits/email/visit_assignment.html', context)
-    
     # Plain text version
     plain_message = f"""
 Hi {context['agent_name']},
@@ -57,12 +52,11 @@ Best regards,
 CRM Team
     """.strip()
     
-    # Send the email
-    send_mail(
+    # Queue the email; it is delivered by the send_queued_emails worker
+    queue_email(
         subject=subject,
-        message=plain_message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
+        body=plain_message,
         recipient_list=[agent.email],
-        html_message=html_message,
-        fail_silently=False,
+        html_template='site_visits/email/visit_assignment.html',
+        context=context,
     )
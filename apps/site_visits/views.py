@@ -4,15 +4,31 @@ from rest_framework.permissions import IsAuthenticated # Or your preferred permi
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
+from django.contrib.auth import get_user_model
+from apps.core.cache import CachedListMixin
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.pagination import CursorPaginationMixin
+from apps.property.models import Property
 from .models import SiteVisit
 from .serializers import SiteVisitSerializer
 
-class SiteVisitViewSet(viewsets.ModelViewSet):
+class SiteVisitViewSet(CursorPaginationMixin, ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows site visits to be viewed or edited.
+    The list is unpaginated unless ?pagination=cursor asks for keyset pages
+    on (created_at, id). Those are ordered newest created first, not by the
+    visit's date and time like the unpaginated list, so switching modes
+    reorders the visits. List and detail answer conditional GETs (ETag).
     """
     serializer_class = SiteVisitSerializer
     permission_classes = [IsAuthenticated] # Adjust permissions as needed
+    # Visits embed their property and users
+    etag_related_models = (Property, get_user_model())
+    cache_models = (SiteVisit, Property, get_user_model())
+
+    def cache_scope(self, user):
+        # Every user sees every visit (see get_queryset)
+        return 'all'
 
     def get_queryset(self):
         """
@@ -23,10 +23,12 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'corsheaders',
+    'apps.core.apps.CoreConfig',
     'apps.accounts.apps.AccountsConfig',
     'apps.property.apps.PropertyConfig',
     'apps.leads.apps.LeadsConfig',
@@ -81,7 +83,7 @@ CORS_ALLOW_METHODS = [
 # --- REST Framework JWT Cookie Auth ---
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Reads the token from the Authorization header or the access_token cookie
         'apps.accounts.authentication.CookieJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -126,7 +128,11 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    # Conditional GETs (apps.core.conditional)
+    'if-none-match',
+    'if-modified-since',
 ]
+CORS_EXPOSE_HEADERS = ['etag', 'last-modified']
 
 # Frontend URL for password reset links, etc.
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
@@ -143,6 +149,28 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='noreply@realestate-crm.com')
 
+# Cache shared by every process: the web workers and the management commands
+# (lead imports, backfills, rebuilds) that bump the cached reads' data
+# versions (apps/core/cache.py). The default database cache needs
+# `python manage.py createcachetable`; Redis is faster
+# (CACHE_BACKEND=django.core.cache.backends.redis.RedisCache,
+# CACHE_LOCATION=redis://...). Never a per-process cache such as LocMemCache.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': config('CACHE_LOCATION', default='crm_cache'),
+    }
+}
+
+# Serve dashboard_stats, team_performance and revenue_overview from the
+# LeadDailyRollup table. Run `manage.py rebuild_lead_rollup` before enabling.
+LEAD_ANALYTICS_USE_ROLLUP = config('LEAD_ANALYTICS_USE_ROLLUP', default=False, cast=bool)
+
+# Build request.user from the access token claims (role, email, ...) instead
+# of reading the users row on every API request. See
+# apps/accounts/authentication.py; relies on the shared CACHES above.
+JWT_CLAIMS_USER = config('JWT_CLAIMS_USER', default=False, cast=bool)
+
 ROOT_URLCONF = 'crmSrc.urls'
 
 TEMPLATES = [
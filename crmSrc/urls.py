@@ -8,7 +8,8 @@ urlpatterns = [
     path('api/', include(('apps.accounts.urls', 'accounts'), namespace='accounts')),
     path('api/', include(('apps.property.urls', 'property'), namespace='property')),
     path('api/', include(('apps.leads.urls', 'leads'), namespace='leads')),
-    path('api/', include(('apps.site_visits.urls', 'site_visits'), namespace='site_visits'))
+    path('api/', include(('apps.site_visits.urls', 'site_visits'), namespace='site_visits')),
+    path('api/', include(('apps.core.urls', 'core'), namespace='core'))
 ]
 
 # Add media URL configuration for property images